@@ -4,5 +4,5 @@ from .views import BannerListCreateView, BannerDetailView, embed_script, banner_
 urlpatterns = [
 	path("", BannerListCreateView.as_view(), name="banner-list-create"),
 	path("<int:pk>/", BannerDetailView.as_view(), name="banner-detail"),
-	path("embed/<str:embed_key>/", banner_metadata, name="banner-metadata"),
+	path("embed/<embedkey:embed_key>/", banner_metadata, name="banner-metadata"),
 ]
@@ -11,7 +11,7 @@ from .models import Banner
 from .serializers import BannerSerializer
 from domains.models import Domain
 from billing.models import BillingProfile
-from billing.guards import get_user_plan, can_use_feature
+from billing.guards import plan_of
 
 log = logging.getLogger(__name__)
 
@@ -79,7 +79,7 @@ class BannerListCreateView(generics.ListCreateAPIView):
 		is_dev = getattr(settings, "DJANGO_ENV", "production") == "development"
 
 		# Check plan limitations
-		plan = get_user_plan(self.request.user)
+		plan = plan_of(self.request)
 		is_free = plan == "free" and not is_dev
 
 		# Free tier: force branding to show
@@ -116,7 +116,7 @@ class BannerDetailView(generics.RetrieveUpdateDestroyAPIView):
 		# Skip plan checks in development mode
 		is_dev = getattr(settings, "DJANGO_ENV", "production") == "development"
 
-		plan = get_user_plan(self.request.user)
+		plan = plan_of(self.request)
 		is_free = plan == "free" and not is_dev
 
 		# Free tier: force branding to show
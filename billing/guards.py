@@ -61,6 +61,51 @@ def get_user_plan(user) -> str:
 	return bp.effective_plan_tier
 
 
+def get_user_plan_for_id(user_id) -> str:
+	"""
+	Same as get_user_plan, keyed by user id.
+	Loads only the BillingProfile columns the tier depends on (no User row).
+	"""
+	bp = (
+		BillingProfile.objects
+		.filter(user_id=user_id)
+		.only("subscription_status", "plan_tier", "price_lookup_key")
+		.first()
+	)
+	if not bp:
+		return "free"
+	return bp.effective_plan_tier
+
+
+# --- Per-request memoized lookups (request lifetime is the natural cache scope) ---
+
+def _billing_cache(request) -> dict:
+	cache = getattr(request, "_cg_billing_cache", None)
+	if cache is None:
+		cache = request._cg_billing_cache = {}
+	return cache
+
+
+def plan_of(request) -> str:
+	"""get_user_plan(request.user), looked up once per request."""
+	cache = _billing_cache(request)
+	if "plan" not in cache:
+		cache["plan"] = get_user_plan(request.user)
+	return cache["plan"]
+
+
+def limit_of(request, limit_key: str = "domains") -> int:
+	"""Plan limit for request.user (defaults to the domain limit)."""
+	from billing.plans import get_plan_limit
+	return get_plan_limit(plan_of(request), limit_key)
+
+
+def feature_of(request, feature: str) -> bool:
+	"""can_use_feature(request.user, feature) without re-reading the billing profile."""
+	from billing.plans import has_feature
+	return has_feature(plan_of(request), feature)
+
+
 def get_plan_limits(user) -> dict:
 	"""Get the plan limits for the user's current tier."""
 	from billing.plans import get_plan_config
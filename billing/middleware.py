@@ -3,9 +3,14 @@ from .guards import has_billing_access
 
 
 class BillingAccessMiddleware:
+	# Only these API areas care about request.has_billing_access
+	BILLING_PREFIXES = ("/api/billing/", "/api/domains/", "/api/banners/", "/api/consents/", "/api/analytics/")
+
 	def __init__(self, get_response):
 		self.get_response = get_response
 
 	def __call__(self, request):
+		if not request.path_info.startswith(self.BILLING_PREFIXES):
+			return self.get_response(request)
 		request.has_billing_access = has_billing_access(request.user)
 		return self.get_response(request)
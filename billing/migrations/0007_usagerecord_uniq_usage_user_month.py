@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-15 09:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0006_add_warning_70_sent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='usagerecord',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='usagerecord',
+            constraint=models.UniqueConstraint(fields=('user', 'month'), name='uniq_usage_user_month'),
+        ),
+    ]
@@ -123,7 +123,10 @@ class UsageRecord(models.Model):
 	updated_at = models.DateTimeField(auto_now=True)
 
 	class Meta:
-		unique_together = ['user', 'month']
+		constraints = [
+			# Conflict target for the per-month pageview upsert
+			models.UniqueConstraint(fields=['user', 'month'], name='uniq_usage_user_month'),
+		]
 		indexes = [
 			models.Index(fields=['user', 'month']),
 		]
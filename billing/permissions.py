@@ -1,5 +1,5 @@
 from rest_framework.permissions import BasePermission
-from .guards import has_billing_access, get_user_plan, can_use_feature
+from .guards import has_billing_access, plan_of, feature_of
 
 
 class HasPaidPlan(BasePermission):
@@ -15,7 +15,7 @@ class HasProPlan(BasePermission):
 	message = "This feature requires a Pro or Agency plan."
 
 	def has_permission(self, request, view):
-		plan = get_user_plan(request.user)
+		plan = plan_of(request)
 		return plan in ("pro", "agency")
 
 
@@ -24,7 +24,7 @@ class HasAgencyPlan(BasePermission):
 	message = "This feature requires an Agency plan."
 
 	def has_permission(self, request, view):
-		return get_user_plan(request.user) == "agency"
+		return plan_of(request) == "agency"
 
 
 class CanRemoveBranding(BasePermission):
@@ -32,7 +32,7 @@ class CanRemoveBranding(BasePermission):
 	message = "Removing branding requires a Pro or Agency plan."
 
 	def has_permission(self, request, view):
-		return can_use_feature(request.user, "remove_branding")
+		return feature_of(request, "remove_branding")
 
 
 class CanUseCookieCategorization(BasePermission):
@@ -40,7 +40,7 @@ class CanUseCookieCategorization(BasePermission):
 	message = "Cookie categorization requires a Pro or Agency plan."
 
 	def has_permission(self, request, view):
-		return can_use_feature(request.user, "cookie_categorization")
+		return feature_of(request, "cookie_categorization")
 
 
 class CanExportCSV(BasePermission):
@@ -48,7 +48,7 @@ class CanExportCSV(BasePermission):
 	message = "CSV export requires a Pro or Agency plan."
 
 	def has_permission(self, request, view):
-		return can_use_feature(request.user, "csv_export")
+		return feature_of(request, "csv_export")
 
 
 class CanViewAuditLogs(BasePermission):
@@ -56,7 +56,7 @@ class CanViewAuditLogs(BasePermission):
 	message = "Audit logs require an Agency plan."
 
 	def has_permission(self, request, view):
-		return can_use_feature(request.user, "audit_logs")
+		return feature_of(request, "audit_logs")
 
 
 class CanManageTeam(BasePermission):
@@ -64,4 +64,4 @@ class CanManageTeam(BasePermission):
 	message = "Team management requires an Agency plan."
 
 	def has_permission(self, request, view):
-		return can_use_feature(request.user, "team_members")
+		return feature_of(request, "team_members")
@@ -5,6 +5,7 @@ Central configuration for all plan tiers and their limits/features.
 Limits can be overridden via environment variables.
 """
 import os
+from functools import lru_cache
 
 PLAN_TIERS = ("free", "pro", "multi_site")
 
@@ -165,6 +166,17 @@ def get_effective_pageview_limit(plan_tier: str) -> int:
     return int(base * (1 + grace))
 
 
+@lru_cache(maxsize=None)
+def get_plan_thresholds(plan_tier: str) -> tuple:
+    """
+    Get pageview warning thresholds for a plan tier as (70%, 80%, 100%, hard).
+    The 70% early warning only applies to the free plan (None otherwise).
+    """
+    base = get_plan_limit(plan_tier, "pageviews_per_month")
+    early = int(base * 0.70) if plan_tier == "free" else None
+    return (early, int(base * 0.80), base, get_effective_pageview_limit(plan_tier))
+
+
 def get_tier_from_lookup_key(lookup_key: str) -> str:
     """Get plan tier from Stripe lookup key. Returns 'free' if not found."""
     return STRIPE_LOOKUP_TO_TIER.get(lookup_key, "free")
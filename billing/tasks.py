@@ -321,3 +321,17 @@ def send_pageview_limit_warning(user_id, current_pageviews, limit, threshold_typ
 	except User.DoesNotExist:
 		log.error(f"User {user_id} not found for pageview warning")
 		return None
+
+
+@shared_task
+def send_pageview_limit_warnings(user_id, current_pageviews, limit, threshold_types):
+	"""
+	Send every pageview warning crossed in a single request with one broker message.
+
+	Args:
+		threshold_types: List of send_pageview_limit_warning threshold types, lowest first
+	"""
+	return [
+		send_pageview_limit_warning(user_id, current_pageviews, limit, threshold_type)
+		for threshold_type in threshold_types
+	]
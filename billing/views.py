@@ -13,8 +13,8 @@ from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema
 
 from .models import BillingProfile, UsageRecord
-from .guards import get_user_plan, get_plan_limits, get_domain_limit, get_pageview_limit
-from .plans import PLAN_LIMITS
+from .guards import plan_of
+from .plans import PLAN_LIMITS, get_plan_config
 import logging
 
 log = logging.getLogger(__name__)
@@ -454,7 +454,6 @@ def my_billing(request):
 			and bool(profile.current_period_end and profile.current_period_end > timezone.now())
 	)
 
-	cpe_iso = profile.current_period_end.isoformat() if profile.current_period_end else None
 	trial_days_remaining = 0
 	if on_trial and profile.current_period_end:
 		delta = profile.current_period_end - timezone.now()
@@ -462,8 +461,8 @@ def my_billing(request):
 		trial_days_remaining = (seconds + 86400 - 1) // 86400  # ceil
 
 	# Get effective plan tier and limits
-	plan_tier = get_user_plan(request.user)
-	limits = get_plan_limits(request.user)
+	plan_tier = plan_of(request)
+	limits = get_plan_config(plan_tier)
 
 	# Get current usage
 	today = timezone.now().date()
@@ -478,7 +477,7 @@ def my_billing(request):
 		"status": profile.subscription_status,
 		"on_trial": on_trial,
 		"trial_days_remaining": trial_days_remaining,
-		"current_period_end": cpe_iso,
+		"current_period_end": profile.current_period_end,
 		"cancel_at_period_end": profile.cancel_at_period_end,
 		"limits": {
 			"domains": limits["domains"],
@@ -570,8 +569,8 @@ def user_usage(request):
 	"""
 	from calendar import monthrange
 
-	plan_tier = get_user_plan(request.user)
-	limits = get_plan_limits(request.user)
+	plan_tier = plan_of(request)
+	limits = get_plan_config(plan_tier)
 	base_limit = limits["pageviews_per_month"]
 	grace_percent = limits["pageviews_grace_percent"]
 	hard_limit = int(base_limit * (1 + grace_percent))
@@ -606,7 +605,7 @@ def user_usage(request):
 		"blocked": pageviews_used >= hard_limit,
 		"grace_limit": hard_limit,
 		"days_until_reset": days_until_reset,
-		"reset_date": reset_date.isoformat(),
+		"reset_date": reset_date,
 	})
 
 
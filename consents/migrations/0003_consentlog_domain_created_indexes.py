@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-15 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consents', '0002_consentlog_banner_version_consentlog_consent_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consentlog',
+            index=models.Index(fields=['domain', '-created_at'], name='consent_domain_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consentlog',
+            index=models.Index(fields=['domain', 'choice', '-created_at'], name='consent_domain_choice_idx'),
+        ),
+    ]
@@ -29,6 +29,11 @@ class ConsentLog(models.Model):
 
 	class Meta:
 		ordering = ["-created_at"]
+		indexes = [
+			# list_consents / export_consents_csv: filter by domain, newest first
+			models.Index(fields=["domain", "-created_at"], name="consent_domain_created_idx"),
+			models.Index(fields=["domain", "choice", "-created_at"], name="consent_domain_choice_idx"),
+		]
 
 	def __str__(self):
 		return f"Consent {self.choice} on {self.domain.url} ({self.created_at.date()})"
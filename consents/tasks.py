@@ -0,0 +1,136 @@
+# consents/tasks.py
+from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.db.models import Q
+import csv
+import io
+import logging
+import orjson
+import uuid
+import redis
+
+log = logging.getLogger(__name__)
+
+# Finished exports live on the export store (the result backend by default), never on the broker.
+# Each export is a Redis list of CSV chunks so neither side holds the whole file at once.
+redis_client = redis.from_url(settings.EXPORT_REDIS_URL)
+EXPORT_TTL = 3600  # 1 hour
+EXPORT_CHUNK_BYTES = 1024 * 1024  # flush a chunk to Redis every ~1MB of CSV
+EXPORT_TIME_LIMIT = 1800  # hard limit for export_consents_task
+EXPORT_OWNER_TTL = EXPORT_TIME_LIMIT + EXPORT_TTL
+
+CSV_HEADER = ["Date", "Domain", "Banner", "Choice", "Categories", "IP", "User Agent"]
+
+
+def iter_keyset(queryset, batch_size: int = 2000):
+	"""
+	Yield rows newest-first in (created_at, id) keyset batches.
+	Each batch is an index range scan instead of a deep LIMIT/OFFSET.
+	"""
+	queryset = queryset.order_by("-created_at", "-id")
+	last = None
+	while True:
+		batch = queryset
+		if last is not None:
+			batch = batch.filter(
+				Q(created_at__lt=last.created_at) | Q(created_at=last.created_at, id__lt=last.id)
+			)
+		rows = list(batch[:batch_size])
+		yield from rows
+		if len(rows) < batch_size:
+			return
+		last = rows[-1]
+
+
+def export_key(export_id: str) -> str:
+	return f"consent_export:{export_id}"
+
+
+def export_owner_key(task_id: str) -> str:
+	return f"consent_export_owner:{task_id}"
+
+
+def remember_export_owner(task_id: str, user_id) -> None:
+	"""Record who queued an export so its status is only shown to them."""
+	# Outlives the task's hard time limit plus the export's own TTL
+	redis_client.setex(export_owner_key(task_id), EXPORT_OWNER_TTL, str(user_id))
+
+
+def get_export_owner(task_id: str) -> str | None:
+	owner = redis_client.get(export_owner_key(task_id))
+	return owner.decode() if owner is not None else None
+
+
+def export_exists(export_id: str) -> bool:
+	return bool(redis_client.exists(export_key(export_id)))
+
+
+def iter_export_chunks(export_id: str):
+	"""Yield a finished CSV export from Redis one chunk at a time."""
+	key = export_key(export_id)
+	for i in range(redis_client.llen(key)):
+		chunk = redis_client.lindex(key, i)
+		if chunk is None:  # expired mid-download
+			return
+		yield chunk
+
+
+# Own limits: the global CELERY_TASK_TIME_LIMIT is sized for scans. The hard limit stays
+# below the broker visibility_timeout so acks_late never redelivers a running export.
+@shared_task(soft_time_limit=1500, time_limit=EXPORT_TIME_LIMIT)
+def export_consents_task(user_id, domain_id=None):
+	"""
+	Build the consent log CSV for a user's domains off the web tier.
+	Rows are streamed to Redis in ~EXPORT_CHUNK_BYTES chunks and kept for
+	EXPORT_TTL seconds; poll the task via GET /api/consents/export/<task_id>/
+	to get the download link.
+	"""
+	from domains.models import Domain
+	from consents.models import ConsentLog
+
+	domains = Domain.objects.filter(user_id=user_id)
+	consents = ConsentLog.objects.filter(domain__in=domains).select_related("domain", "banner")
+	if domain_id:
+		consents = consents.filter(domain_id=domain_id)
+
+	export_id = str(uuid.uuid4())
+	# Build under a temporary key and rename at the end, so a half-written export is never served
+	partial_key = f"{export_key(export_id)}:partial"
+
+	buf = io.StringIO()
+	writer = csv.writer(buf)
+	writer.writerow(CSV_HEADER)
+
+	def flush():
+		redis_client.rpush(partial_key, buf.getvalue().encode("utf-8"))
+		redis_client.expire(partial_key, EXPORT_TTL)
+		buf.seek(0)
+		buf.truncate()
+
+	rows = 0
+	try:
+		for c in iter_keyset(consents):
+			writer.writerow([
+				c.created_at.isoformat(),
+				c.domain.url,
+				c.banner.name if c.banner else "",
+				c.choice,
+				orjson.dumps(c.categories).decode() if c.categories else "",
+				c.truncated_ip,
+				c.user_agent,
+			])
+			rows += 1
+			if buf.tell() >= EXPORT_CHUNK_BYTES:
+				flush()
+		flush()
+		redis_client.rename(partial_key, export_key(export_id))
+		redis_client.expire(export_key(export_id), EXPORT_TTL)
+	except SoftTimeLimitExceeded:
+		redis_client.delete(partial_key)
+		log.warning(f"[Consent Export] Timed out after {rows} rows for user {user_id}")
+		raise
+
+	log.info(f"[Consent Export] {rows} rows for user {user_id} -> {export_id}")
+
+	return {"user_id": user_id, "export_id": export_id, "rows": rows}
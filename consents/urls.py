@@ -5,5 +5,7 @@ urlpatterns = [
 	path("create/", views.log_consent, name="log_consent"),  # POST /api/consents/create/
 	path("", views.list_consents, name="list_consents"),
 	path("pageview/", views.track_pageview, name="track_pageview"),  # POST /api/consents/pageview/
-	path("export/", views.export_consents_csv, name="export_consents_csv"),  # GET /api/consents/export/
+	path("export/", views.export_consents_csv, name="export_consents_csv"),  # POST /api/consents/export/
+	path("export/<str:task_id>/", views.export_consents_status, name="export_consents_status"),
+	path("export/<str:task_id>/download/", views.download_consents_export, name="download_consents_export"),
 ]
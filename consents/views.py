@@ -1,24 +1,64 @@
-import csv
-import json
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
-from django.http import HttpResponse
+from rest_framework.pagination import CursorPagination
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
 from django.utils import timezone
+from django.db import IntegrityError, connection, transaction
 from django.db.models import F
+from celery.result import AsyncResult
 from ipaddress import ip_address, IPv4Address, IPv6Address
+import uuid
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from .models import ConsentLog
-from .serializers import ConsentLogSerializer
+from .tasks import export_consents_task, export_exists, get_export_owner, iter_export_chunks, remember_export_owner
 from domains.models import Domain
+from banners.models import Banner
 from billing.models import UsageRecord
-from billing.guards import get_user_plan, get_effective_pageview_limit, get_pageview_limit
+from billing.guards import get_user_plan_for_id
+from billing.plans import get_plan_limit, get_plan_thresholds
 from billing.permissions import CanExportCSV
 
 
+class ConsentLogCursorPagination(CursorPagination):
+	"""Keyset pagination over (domain, -created_at) - no deep OFFSET scans."""
+	page_size = 50
+	ordering = "-created_at"
+
+
+# JS banner choice -> ConsentLog.choice
+CHOICE_MAP = {
+	"accept_all": "accept",
+	"reject_all": "reject",
+	"preferences_opened": "prefs",
+	"preferences_saved": "prefs",  # When user saves custom preferences
+}
+
+# UsageRecord flag + warning email type, in get_plan_thresholds() order
+PAGEVIEW_WARNINGS = (
+	("warning_70_sent", "early_warning"),  # Free plan only
+	("warning_80_sent", "approaching"),
+	("warning_100_sent", "reached"),
+	("warning_hard_limit_sent", "blocked"),
+)
+
+CONSENT_CHOICES = {value for value, _ in ConsentLog.CHOICES}
+MAX_CONSENT_CATEGORIES = 32
+
+PAGEVIEW_STATEMENT_TIMEOUT_MS = 2000
+
+
+def set_local_statement_timeout(ms: int):
+	"""Postgres-only: statement_timeout for the current transaction (SET LOCAL)."""
+	if connection.vendor != "postgresql":
+		return
+	with connection.cursor() as cursor:
+		cursor.execute("SELECT set_config('statement_timeout', %s, true)", [str(ms)])
+
+
 def truncate_ip(ip_str: str) -> str:
 	"""Return anonymized IP (e.g., 192.168.54.203 -> 192.168.54.0)."""
 	if not ip_str:
@@ -33,7 +73,7 @@ def truncate_ip(ip_str: str) -> str:
 			return ":".join(hextets[:3]) + "::"
 	except ValueError:
 		pass
-	return ip_str  # fallback if invalid format
+	return ""  # invalid format - don't store it
 
 
 @extend_schema(
@@ -62,66 +102,75 @@ def log_consent(request):
 	Automatically links the correct domain via embed_key,
 	captures anonymized IP & user agent, and maps choice aliases.
 	"""
-	data = request.data.copy()
+	raw = request.data
 
 	# 1️⃣ Find the domain via embed_key
-	embed_key = data.get("embed_key")
+	embed_key = raw.get("embed_key")
 	try:
 		domain = Domain.objects.get(embed_key=embed_key)
-		data["domain"] = domain.id
 	except Domain.DoesNotExist:
 		return Response(
 			{"success": False, "error": "Invalid embed_key"},
 			status=status.HTTP_400_BAD_REQUEST,
 		)
 
-	# 2️⃣ Rename banner_id -> banner for serializer
-	if "banner_id" in data:
-		data["banner"] = data.pop("banner_id")
-
-	# 3️⃣ Map JS choice → model choice
-	choice_map = {
-		"accept_all": "accept",
-		"reject_all": "reject",
-		"preferences_opened": "prefs",
-		"preferences_saved": "prefs",  # When user saves custom preferences
-	}
-	choice = data.get("choice")
-	if choice in choice_map:
-		data["choice"] = choice_map[choice]
-
-	# 3.5️⃣ Map "preferences" to "categories" field
-	if "preferences" in data:
-		data["categories"] = data.pop("preferences")
-
-	# 4️⃣ Capture IP + UA
-	xff = request.META.get("HTTP_X_FORWARDED_FOR")
-	real_ip = xff.split(",")[0].strip() if xff else request.META.get("REMOTE_ADDR")
-	data["truncated_ip"] = truncate_ip(real_ip)
-	data["user_agent"] = request.META.get("HTTP_USER_AGENT", "")
-
-	# 5️⃣ Timestamp
-	data["created_at"] = timezone.now()
-
-	# 6️⃣ Validate + save
-	serializer = ConsentLogSerializer(data=data)
-	if serializer.is_valid():
-		log = serializer.save()
+	# 2️⃣ Map JS choice → model choice
+	choice = raw.get("choice")
+	if isinstance(choice, str):
+		choice = CHOICE_MAP.get(choice, choice)
+
+	# 3️⃣ Map "preferences" to categories (null when accepting/rejecting all)
+	categories = raw.get("preferences")
+	if categories is None:
+		categories = {}
+
+	# 4️⃣ Validate by hand - this is the hottest public write, skip the serializer
+	errors = {}
+	if not isinstance(choice, str) or choice not in CONSENT_CHOICES:
+		errors["choice"] = [f'"{choice}" is not a valid choice.']
+	if not isinstance(categories, dict) or len(categories) > MAX_CONSENT_CATEGORIES:
+		errors["categories"] = ["Expected an object of category -> boolean."]
+
+	banner = None
+	# Like PrimaryKeyRelatedField: ints or digit strings only (no bools, no truncated floats)
+	banner_id = raw.get("banner_id")
+	if isinstance(banner_id, str) and banner_id.strip().isascii() and banner_id.strip().isdigit():
+		banner_id = int(banner_id)
+	if not isinstance(banner_id, int) or isinstance(banner_id, bool):
+		errors["banner"] = ["A valid integer is required."]
+	else:
+		banner = Banner.objects.only("id", "version").filter(pk=banner_id).first()
+		if banner is None:
+			errors["banner"] = [f'Invalid pk "{banner_id}" - object does not exist.']
+
+	if errors:
 		return Response(
-			{
-				"success": True,
-				"consent_id": str(log.consent_id),
-				"choice": log.choice,
-				"banner_id": log.banner_id,
-				"domain": domain.url,
-				"timestamp": log.created_at,
-			},
-			status=status.HTTP_201_CREATED,
+			{"success": False, "errors": errors},
+			status=status.HTTP_400_BAD_REQUEST,
 		)
 
+	# 5️⃣ Capture IP + UA, then save
+	xff = request.META.get("HTTP_X_FORWARDED_FOR")
+	real_ip = xff.split(",")[0].strip() if xff else request.META.get("REMOTE_ADDR")
+	log = ConsentLog.objects.create(
+		domain=domain,
+		banner=banner,
+		banner_version=banner.version,  # snapshot of banner at time of consent
+		choice=choice,
+		categories=categories,
+		truncated_ip=truncate_ip(real_ip) or None,
+		user_agent=request.META.get("HTTP_USER_AGENT", ""),
+	)
 	return Response(
-		{"success": False, "errors": serializer.errors},
-		status=status.HTTP_400_BAD_REQUEST,
+		{
+			"success": True,
+			"consent_id": str(log.consent_id),
+			"choice": log.choice,
+			"banner_id": log.banner_id,
+			"domain": domain.url,
+			"timestamp": log.created_at,
+		},
+		status=status.HTTP_201_CREATED,
 	)
 
 
@@ -131,7 +180,6 @@ def log_consent(request):
 		OpenApiParameter(name="choice", type=OpenApiTypes.STR, description="Filter by choice (accept, reject, prefs)"),
 	],
 	responses={200: {"type": "object", "properties": {
-		"count": {"type": "integer"},
 		"next": {"type": "string", "nullable": True},
 		"previous": {"type": "string", "nullable": True},
 		"results": {"type": "array", "items": {"type": "object"}}
@@ -143,7 +191,7 @@ def log_consent(request):
 def list_consents(request):
 	"""
 	Returns consent logs for all domains owned by the logged-in user.
-	Supports pagination and includes banner + domain info.
+	Supports cursor pagination and includes banner + domain info.
 	"""
 	domains = Domain.objects.filter(user=request.user)
 	logs = ConsentLog.objects.filter(domain__in=domains).select_related("banner", "domain")
@@ -157,9 +205,8 @@ def list_consents(request):
 	if choice:
 		logs = logs.filter(choice=choice)
 
-	# Pagination
-	paginator = PageNumberPagination()
-	paginator.page_size = 50
+	# Cursor pagination (newest first, served by consent_domain_created_idx)
+	paginator = ConsentLogCursorPagination()
 	page = paginator.paginate_queryset(logs, request)
 
 	data = [
@@ -205,7 +252,7 @@ def track_pageview(request):
 	- 100%: "Limit reached, grace period active"
 	- 115%: "Hard limit reached, views blocked"
 	"""
-	from billing.tasks import send_pageview_limit_warning
+	from billing.tasks import send_pageview_limit_warnings
 
 	embed_key = request.data.get("embed_key")
 	if not embed_key:
@@ -214,75 +261,64 @@ def track_pageview(request):
 			status=status.HTTP_400_BAD_REQUEST,
 		)
 
-	try:
-		domain = Domain.objects.select_related("user").get(embed_key=embed_key)
-	except Domain.DoesNotExist:
+	# Only the owner id is needed here - skip hydrating Domain/User rows
+	row = Domain.objects.filter(embed_key=embed_key).values("id", "user_id").first()
+	if row is None:
 		return Response(
 			{"success": False, "error": "Invalid embed_key"},
 			status=status.HTTP_400_BAD_REQUEST,
 		)
 
-	user = domain.user
-	if not user:
+	user_id = row["user_id"]
+	if not user_id:
 		return Response({"success": False, "error": "Domain has no owner"}, status=status.HTTP_400_BAD_REQUEST)
 
-	# Get or create this month's usage record (per account)
-	today = timezone.now().date()
-	month_start = today.replace(day=1)
-	usage, _ = UsageRecord.objects.get_or_create(
-		user=user,
-		month=month_start,
-		defaults={"pageviews": 0, "scans_used": 0}
-	)
-
-	# Increment pageviews atomically
-	UsageRecord.objects.filter(pk=usage.pk).update(pageviews=F("pageviews") + 1)
-	usage.refresh_from_db()
-
 	# Check limits with grace period
-	base_limit = get_pageview_limit(user)
-	effective_limit = get_effective_pageview_limit(user)
-
-	# Calculate thresholds
-	threshold_70 = int(base_limit * 0.70)
-	threshold_80 = int(base_limit * 0.80)
-	threshold_100 = base_limit
-	threshold_hard = effective_limit  # 115% (base + grace)
-
-	over_70 = usage.pageviews >= threshold_70
-	over_80 = usage.pageviews >= threshold_80
-	over_100 = usage.pageviews >= threshold_100
-	over_hard = usage.pageviews >= threshold_hard
-
-	# Get user's plan for 70% threshold (free plan only)
-	user_plan = get_user_plan(user)
-
-	# Send warning emails at each threshold (first time only)
-	update_fields = []
-
-	# 70% early warning - only for free plan users
-	if user_plan == "free" and over_70 and not usage.warning_70_sent:
-		usage.warning_70_sent = True
-		update_fields.append("warning_70_sent")
-		send_pageview_limit_warning.delay(user.id, usage.pageviews, base_limit, "early_warning")
-
-	if over_80 and not usage.warning_80_sent:
-		usage.warning_80_sent = True
-		update_fields.append("warning_80_sent")
-		send_pageview_limit_warning.delay(user.id, usage.pageviews, base_limit, "approaching")
-
-	if over_100 and not usage.warning_100_sent:
-		usage.warning_100_sent = True
-		update_fields.append("warning_100_sent")
-		send_pageview_limit_warning.delay(user.id, usage.pageviews, base_limit, "reached")
-
-	if over_hard and not usage.warning_hard_limit_sent:
-		usage.warning_hard_limit_sent = True
-		update_fields.append("warning_hard_limit_sent")
-		send_pageview_limit_warning.delay(user.id, usage.pageviews, base_limit, "blocked")
-
-	if update_fields:
-		usage.save(update_fields=update_fields)
+	user_plan = get_user_plan_for_id(user_id)
+	base_limit = get_plan_limit(user_plan, "pageviews_per_month")
+	thresholds = get_plan_thresholds(user_plan)
+
+	# Keep the write path to one short transaction (PgBouncer transaction pooling)
+	# and cap it so a stalled row lock can't pin an API worker.
+	with transaction.atomic():
+		set_local_statement_timeout(PAGEVIEW_STATEMENT_TIMEOUT_MS)
+
+		# Increment this month's usage record (per account), creating it on first pageview
+		month_start = timezone.now().date().replace(day=1)
+		usage_qs = UsageRecord.objects.filter(user_id=user_id, month=month_start)
+		if not usage_qs.update(pageviews=F("pageviews") + 1):
+			try:
+				with transaction.atomic():
+					UsageRecord.objects.create(user_id=user_id, month=month_start, pageviews=1)
+			except IntegrityError:
+				# Lost the race on uniq_usage_user_month - the row exists now
+				usage_qs.update(pageviews=F("pageviews") + 1)
+		usage = usage_qs.only("pk", "pageviews", *(flag for flag, _ in PAGEVIEW_WARNINGS)).get()
+
+		# Bit i set = threshold i crossed / warning i already sent
+		crossed = 0
+		sent = 0
+		for bit, (threshold, (flag, _)) in enumerate(zip(thresholds, PAGEVIEW_WARNINGS)):
+			if threshold is not None and usage.pageviews >= threshold:
+				crossed |= 1 << bit
+			if getattr(usage, flag):
+				sent |= 1 << bit
+
+		over_100 = bool(crossed & 0b0100)
+		over_hard = bool(crossed & 0b1000)
+
+		# Send warning emails at each threshold (first time only).
+		# The conditional UPDATE claims the flag, so concurrent workers can't double-send.
+		pending = crossed & ~sent
+		threshold_types = []
+		for bit, (flag, threshold_type) in enumerate(PAGEVIEW_WARNINGS):
+			if not pending & (1 << bit):
+				continue
+			if UsageRecord.objects.filter(pk=usage.pk, **{flag: False}).update(**{flag: True}):
+				threshold_types.append(threshold_type)
+
+	if threshold_types:
+		send_pageview_limit_warnings.delay(user_id, usage.pageviews, base_limit, threshold_types)
 
 	return Response({
 		"success": True,
@@ -297,40 +333,82 @@ def track_pageview(request):
 	parameters=[
 		OpenApiParameter(name="domain", type=OpenApiTypes.STR, description="Filter by domain ID"),
 	],
-	responses={200: {"description": "CSV file download"}},
-	description="Export consent logs as CSV (requires Pro or Agency plan)",
+	responses={202: {"type": "object", "properties": {"task_id": {"type": "string"}}}},
+	description="Queue a CSV export of consent logs (requires Pro or Agency plan). Returns a task_id to poll.",
 	tags=["Consents"]
 )
-@api_view(["GET"])
+@api_view(["POST"])
 @permission_classes([CanExportCSV])
 def export_consents_csv(request):
 	"""
-	Export consent logs as CSV.
+	Queue a consent log CSV export via Celery.
 	Requires Pro or Agency plan.
 	"""
-	domains = Domain.objects.filter(user=request.user)
-	consents = ConsentLog.objects.filter(domain__in=domains).select_related("domain", "banner")
-
-	# Optional filtering
-	domain_id = request.query_params.get("domain")
+	domain_id = request.query_params.get("domain") or request.data.get("domain")
 	if domain_id:
-		consents = consents.filter(domain_id=domain_id)
+		# Fail here with a 400/404, not later as a task FAILURE in the export worker
+		try:
+			domain_id = str(uuid.UUID(str(domain_id)))
+		except ValueError:
+			return Response({"error": "Invalid domain ID"}, status=status.HTTP_400_BAD_REQUEST)
+		if not Domain.objects.filter(pk=domain_id, user=request.user).exists():
+			raise Http404("Domain not found")
+	# Owner is recorded before the task exists, so the status endpoint never sees it unowned
+	task_id = str(uuid.uuid4())
+	remember_export_owner(task_id, request.user.id)
+	export_consents_task.apply_async((request.user.id,), {"domain_id": domain_id or None}, task_id=task_id)
+	return Response({"task_id": task_id}, status=status.HTTP_202_ACCEPTED)
+
+
+def _owned_export(request, task_id):
+	"""Return (AsyncResult, payload) where payload is set once the user's export finished."""
+	# Checked before any state is reported, so other users' (or non-export) tasks stay opaque
+	if get_export_owner(task_id) != str(request.user.id):
+		raise Http404("Export not found")
+	result = AsyncResult(task_id)
+	if not result.successful():
+		return result, None
+	payload = result.result
+	# Any task id can be passed in; only a dict from this user's export counts
+	if not isinstance(payload, dict) or payload.get("user_id") != request.user.id:
+		raise Http404("Export not found")
+	return result, payload
 
-	response = HttpResponse(content_type="text/csv")
-	response["Content-Disposition"] = 'attachment; filename="cookieguard_consents.csv"'
 
-	writer = csv.writer(response)
-	writer.writerow(["Date", "Domain", "Banner", "Choice", "Categories", "IP", "User Agent"])
+@extend_schema(
+	responses={200: {"type": "object", "properties": {
+		"status": {"type": "string"},
+		"rows": {"type": "integer", "nullable": True},
+		"download_url": {"type": "string", "nullable": True}
+	}}},
+	description="Get the status of a consent CSV export",
+	tags=["Consents"]
+)
+@api_view(["GET"])
+@permission_classes([CanExportCSV])
+def export_consents_status(request, task_id):
+	result, payload = _owned_export(request, task_id)
+	if payload is None:
+		return Response({"status": result.status, "rows": None, "download_url": None})
+	return Response({
+		"status": result.status,
+		"rows": payload.get("rows"),
+		"download_url": reverse("download_consents_export", args=[task_id]),
+	})
+
 
-	for c in consents:
-		writer.writerow([
-			c.created_at.isoformat(),
-			c.domain.url,
-			c.banner.name if c.banner else "",
-			c.choice,
-			json.dumps(c.categories) if c.categories else "",
-			c.truncated_ip,
-			c.user_agent,
-		])
+@extend_schema(
+	responses={200: {"description": "CSV file download"}},
+	description="Download a finished consent CSV export",
+	tags=["Consents"]
+)
+@api_view(["GET"])
+@permission_classes([CanExportCSV])
+def download_consents_export(request, task_id):
+	_, payload = _owned_export(request, task_id)
+	if not payload or not export_exists(payload["export_id"]):
+		raise Http404("Export not found or expired")
 
+	response = StreamingHttpResponse(iter_export_chunks(payload["export_id"]), content_type="text/csv")
+	response["Content-Disposition"] = 'attachment; filename="cookieguard_consents.csv"'
 	return response
@@ -0,0 +1,15 @@
+# cookieguard/converters.py
+
+
+class EmbedKeyConverter:
+	"""
+	URL-safe base64 embed keys: 32 chars (legacy token_urlsafe(24)) up to 40 (token_urlsafe(30)).
+	Malformed keys 404 in the resolver instead of costing a DB lookup.
+	"""
+	regex = r"[A-Za-z0-9_-]{32,40}"
+
+	def to_python(self, value: str) -> str:
+		return value
+
+	def to_url(self, value: str) -> str:
+		return value
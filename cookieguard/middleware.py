@@ -0,0 +1,65 @@
+# cookieguard/middleware.py
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_vary_headers
+
+# Public, cookie-less endpoints that don't need sessions, CSRF, auth or billing.
+# Compared against request.path_info so prefixed deployments keep working.
+_EXCLUDED_PATHS = ("/scripts/",)
+
+
+class FastPathMiddleware:
+	"""
+	Serve embed script requests straight from the view, skipping the
+	rest of the middleware chain. Must sit right after SecurityMiddleware,
+	so the SSL redirect, HSTS and nosniff headers still apply.
+	"""
+
+	def __init__(self, get_response):
+		self.get_response = get_response
+
+	def __call__(self, request):
+		if request.path_info.startswith(_EXCLUDED_PATHS):
+			try:
+				match = resolve(request.path_info)
+			except Resolver404:
+				return self.get_response(request)
+			request.resolver_match = match
+			return match.func(request, *match.args, **match.kwargs)
+		return self.get_response(request)
+
+
+class CORSFastMiddleware:
+	"""
+	Stand-in for corsheaders' CorsMiddleware under CORS_ALLOW_ALL_ORIGINS.
+	Every origin is allowed, so there is no URL/origin regex work per request:
+	header values are built once here and the request's Origin is echoed back
+	(required because CORS_ALLOW_CREDENTIALS rules out "*").
+	"""
+
+	def __init__(self, get_response):
+		self.get_response = get_response
+		self.allow_credentials = getattr(settings, "CORS_ALLOW_CREDENTIALS", False)
+		self.preflight_headers = {
+			"Access-Control-Allow-Headers": ", ".join(settings.CORS_ALLOW_HEADERS),
+			"Access-Control-Allow-Methods": ", ".join(settings.CORS_ALLOW_METHODS),
+			"Access-Control-Max-Age": str(getattr(settings, "CORS_PREFLIGHT_MAX_AGE", 86400)),
+		}
+
+	def __call__(self, request):
+		origin = request.headers.get("origin")
+		if not origin:
+			return self.get_response(request)
+
+		if request.method == "OPTIONS" and "access-control-request-method" in request.headers:
+			response = HttpResponse(headers={"Content-Length": "0"})
+			response.headers.update(self.preflight_headers)
+		else:
+			response = self.get_response(request)
+
+		response.headers["Access-Control-Allow-Origin"] = origin
+		if self.allow_credentials:
+			response.headers["Access-Control-Allow-Credentials"] = "true"
+		patch_vary_headers(response, ("origin",))
+		return response
@@ -0,0 +1,49 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# DRF's encoder still handles the odd types orjson doesn't (Decimal, lazy strings, timedelta...)
+_fallback = JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+	"""
+	Drop-in JSONRenderer that encodes with orjson.
+	Datetimes (UTC as "Z", like DRF), UUIDs, dicts and lists are serialized in C,
+	so views can hand raw .values() rows straight to Response.
+	"""
+	# TIME_ZONE is UTC, so naive datetimes are UTC too
+	options = orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+	def render(self, data, accepted_media_type=None, renderer_context=None):
+		if data is None:
+			return b""
+
+		options = self.options
+		if self.get_indent(accepted_media_type, renderer_context or {}):
+			options |= orjson.OPT_INDENT_2
+
+		return orjson.dumps(data, default=_fallback.default, option=options)
+
+
+def stream_json_object(head: dict, key: str, items, batch_size: int = 500):
+	"""
+	Yield the JSON for {**head, key: [*items]} in pieces, encoding `items`
+	batch_size at a time so a large list is never built (or rendered) whole.
+	Use as the body of a StreamingHttpResponse.
+	"""
+	encode = ORJSONRenderer.options
+	default = _fallback.default
+	# head's closing "}" is re-emitted after the list
+	yield orjson.dumps(head, default=default, option=encode)[:-1] + (b',"' if head else b'"') + key.encode() + b'":['
+
+	sep = b""
+	batch = []
+	for item in items:
+		batch.append(item)
+		if len(batch) >= batch_size:
+			yield sep + orjson.dumps(batch, default=default, option=encode)[1:-1]
+			sep, batch = b",", []
+	if batch:
+		yield sep + orjson.dumps(batch, default=default, option=encode)[1:-1]
+	yield b"]}"
@@ -51,8 +51,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-	"corsheaders.middleware.CorsMiddleware",
+	"cookieguard.middleware.CORSFastMiddleware",  # replaces corsheaders' CorsMiddleware (all origins allowed)
 	"django.middleware.security.SecurityMiddleware",
+	"cookieguard.middleware.FastPathMiddleware",  # after SecurityMiddleware: SSL redirect, HSTS, nosniff still apply
 	"whitenoise.middleware.WhiteNoiseMiddleware",
 	"django.contrib.sessions.middleware.SessionMiddleware",
 	"django.middleware.common.CommonMiddleware",
@@ -108,7 +109,7 @@ REST_FRAMEWORK = {
 		"users.permissions.NotBlocked",
 	),
 	"DEFAULT_RENDERER_CLASSES": (
-		"rest_framework.renderers.JSONRenderer",
+		"cookieguard.renderers.ORJSONRenderer",
 	),
 	'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
@@ -124,28 +125,33 @@ def preprocessing_filter_spec(endpoints):
 	return filtered
 
 
+# Schema tag name mapping (lowercase -> proper case)
+_TAG_MAP = {
+	'auth': 'Auth',
+	'users': 'Users',
+	'billing': 'Billing',
+	'domains': 'Domains',
+	'banners': 'Banners',
+	'consents': 'Consents',
+	'scanner': 'Scanner',
+	'analytics': 'Analytics',
+	'support': 'Support',
+}
+_NORMALIZED_TAGS = frozenset(_TAG_MAP.values())
+
+
 def postprocessing_hook(result, generator, request, public):
 	"""Normalize all tags to title case and sort alphabetically."""
-	# Tag name mapping (lowercase -> proper case)
-	tag_map = {
-		'auth': 'Auth',
-		'users': 'Users',
-		'billing': 'Billing',
-		'domains': 'Domains',
-		'banners': 'Banners',
-		'consents': 'Consents',
-		'scanner': 'Scanner',
-		'analytics': 'Analytics',
-		'support': 'Support',
-	}
-
 	# Normalize tags in all paths
 	for path_data in result.get('paths', {}).values():
 		for method_data in path_data.values():
-			if isinstance(method_data, dict) and 'tags' in method_data:
-				method_data['tags'] = [
-					tag_map.get(tag.lower(), tag.title()) for tag in method_data['tags']
-				]
+			if not isinstance(method_data, dict):
+				continue
+			tags = method_data.get('tags')
+			# Most views already declare the canonical tag - nothing to rebuild
+			if not tags or _NORMALIZED_TAGS.issuperset(tags):
+				continue
+			method_data['tags'] = [_TAG_MAP.get(tag.lower(), tag.title()) for tag in tags]
 
 	# Sort the tags list alphabetically
 	if 'tags' in result:
@@ -203,14 +209,33 @@ TEMPLATES = [
 WSGI_APPLICATION = 'cookieguard.wsgi.application'
 
 # Database
-if ENV == "production":
+# Any environment with DATABASE_URL (production, staging) gets persistent,
+# health-checked connections; local dev without it falls back to SQLite.
+DATABASE_URL = os.getenv("DATABASE_URL")
+if DATABASE_URL:
 	DATABASES = {
-		"default": dj_database_url.config(
-			default=os.getenv("DATABASE_URL"),
-			conn_max_age=600,
-			ssl_require=True
+		"default": dj_database_url.parse(
+			DATABASE_URL,
+			# The eventlet worker sets DB_CONN_MAX_AGE=0: a persistent connection per greenlet
+			# would leave up to -c idle connections open
+			conn_max_age=int(os.getenv("DB_CONN_MAX_AGE", 600)),
+			conn_health_checks=True,
+			ssl_require=ENV == "production",
 		)
 	}
+	# Safe behind PgBouncer in transaction pooling mode (pool_mode=transaction):
+	# server-side cursors don't survive a connection being handed to another client.
+	DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+	# TCP keepalives so pooled connections survive NAT/load-balancer idle kills
+	# (libpq connection parameters, so only for the postgresql backend)
+	if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+		DATABASES["default"].setdefault("OPTIONS", {}).update({
+			"connect_timeout": 5,
+			"keepalives": 1,
+			"keepalives_idle": 30,
+			"keepalives_interval": 10,
+			"keepalives_count": 5,
+		})
 else:
 	DATABASES = {
 		"default": {
@@ -275,9 +300,40 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Celery Configuration
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+# Where finished consent CSV exports are stored; keeps large files off the broker
+EXPORT_REDIS_URL = os.getenv("EXPORT_REDIS_URL", CELERY_RESULT_BACKEND)
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 
+# Reuse broker/result connections instead of reconnecting on every .delay()
+CELERY_BROKER_POOL_LIMIT = 10
+CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+	"visibility_timeout": 3600,  # well above CELERY_TASK_TIME_LIMIT, so acks_late won't redeliver live tasks
+	"socket_keepalive": True,
+}
+CELERY_RESULT_BACKEND_TRANSPORT_OPTIONS = {
+	"socket_keepalive": True,
+	"retry_on_timeout": True,
+}
+# Ack after the task finishes and hand out one scan at a time per process
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Only network-bound email sends go to the "fast" queue, served by an eventlet worker
+# (psycopg2 blocks the hub, so DB-heavy tasks like the monthly reports and scheduled
+# scan fan-out stay on the default "celery" queue). Playwright scans ("scans") and the
+# default queue are consumed by the prefork worker; consent CSV exports ("exports")
+# get their own worker so they never hold a scan slot.
+CELERY_TASK_ROUTES = {
+	"billing.tasks.send_welcome_email": {"queue": "fast"},
+	"billing.tasks.send_pageview_limit_warning": {"queue": "fast"},
+	"billing.tasks.send_pageview_limit_warnings": {"queue": "fast"},
+	# Long Playwright scans get their own queue; the prefork worker runs with -Ofair
+	"scanner.tasks.run_scan_task": {"queue": "scans"},
+	"consents.tasks.export_consents_task": {"queue": "exports"},
+}
+
 # Worker settings for 2GB RAM worker
 CELERY_WORKER_MAX_TASKS_PER_CHILD = 50  # Restart after 50 tasks to prevent memory leaks
 CELERY_WORKER_CONCURRENCY = 2  # 2 concurrent scans (~500MB each = 1GB, leaves 1GB headroom)
@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.contrib.admin.views.decorators import staff_member_required
-from django.urls import path, include
+from django.urls import path, include, register_converter
 from django.conf import settings
 from django.conf.urls.static import static
+from django.views.decorators.cache import cache_page
 from rest_framework_simplejwt.views import (
 	TokenObtainPairView,
 	TokenRefreshView,
@@ -10,6 +11,10 @@ from rest_framework_simplejwt.views import (
 from banners.views import embed_script
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 from drf_spectacular.utils import extend_schema, extend_schema_view
+from .converters import EmbedKeyConverter
+
+# Registered before the include()s below so app URLconfs can use <embedkey:...>
+register_converter(EmbedKeyConverter, "embedkey")
 
 
 # Customize JWT views with proper schema tags
@@ -38,7 +43,7 @@ urlpatterns = [
 	path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
 	path('api/token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
 	path('api/auth/', include('users.urls')),
-	path("scripts/<str:embed_key>.js", embed_script, name="embed_script"),
+	path("scripts/<embedkey:embed_key>.js", embed_script, name="embed_script"),
 	path('api/', include('scanner.urls')),
 	path('api/billing/', include('billing.urls')),
 	path('api/domains/', include('domains.urls')),
@@ -51,7 +56,9 @@ urlpatterns = [
 	path('testing/', include('testing.urls')),
 
 	# API Documentation (superuser only - redirects to admin login if not authenticated)
-	path('api/schema/', staff_member_required(SpectacularAPIView.as_view()), name='schema'),
+	# Schema generation (incl. the postprocessing hook) is cached for an hour; the staff
+	# check wraps the cache so cached copies are never served to anyone else.
+	path('api/schema/', staff_member_required(cache_page(3600)(SpectacularAPIView.as_view())), name='schema'),
 	path('api/docs/', staff_member_required(SpectacularSwaggerView.as_view(url_name='schema')), name='swagger-ui'),
 	path('api/redoc/', staff_member_required(SpectacularRedocView.as_view(url_name='schema')), name='redoc'),
 ]
@@ -3,8 +3,11 @@ from django.db.models import Field
 from .models import Domain, CookieCategory
 
 
+_FIELDS = frozenset(f.name for f in Domain._meta.get_fields() if isinstance(f, Field))
+
+
 def has_field(name: str) -> bool:
-	return any(f.name == name for f in Domain._meta.get_fields() if isinstance(f, Field))
+	return name in _FIELDS
 
 
 base_list = [f for f in ("url", "embed_key", "last_scan_at", "created_at") if has_field(f)]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-15 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domains', '0006_cookiecategory'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cookiecategory',
+            index=models.Index(fields=['domain', 'category', 'script_name'], name='cookiecat_domain_order_idx'),
+        ),
+    ]
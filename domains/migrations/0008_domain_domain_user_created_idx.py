@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-15 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domains', '0007_cookiecategory_cookiecat_domain_order_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='domain',
+            index=models.Index(fields=['user', '-created_at'], name='domain_user_created_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 # domains/models.py
+import secrets
 import uuid
 from django.db import models
 from django.contrib.auth import get_user_model
@@ -6,6 +7,11 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
+def generate_embed_key() -> str:
+	"""40-char URL-safe key: token_urlsafe(30) is exactly Domain.embed_key's max_length, no slicing."""
+	return secrets.token_urlsafe(30)
+
+
 class Domain(models.Model):
 	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 	url = models.URLField(max_length=500, unique=False)
@@ -20,10 +26,15 @@ class Domain(models.Model):
 		User, null=True, blank=True, on_delete=models.SET_NULL, related_name="domains_created"
 	)
 
+	class Meta:
+		indexes = [
+			# domains_list: filter(user=...).order_by("-created_at")
+			models.Index(fields=['user', '-created_at'], name='domain_user_created_idx'),
+		]
+
 	def save(self, *args, **kwargs):
 		if not self.embed_key:
-			import secrets
-			self.embed_key = secrets.token_urlsafe(24)[:40]
+			self.embed_key = generate_embed_key()
 		return super().save(*args, **kwargs)
 
 
@@ -45,6 +56,9 @@ class CookieCategory(models.Model):
 
 	class Meta:
 		unique_together = ['domain', 'script_name']
+		indexes = [
+			models.Index(fields=['domain', 'category', 'script_name'], name='cookiecat_domain_order_idx'),
+		]
 		verbose_name_plural = "Cookie categories"
 
 	def __str__(self):
@@ -1,8 +1,6 @@
 from rest_framework import serializers
 from .models import Domain, CookieCategory
-import re
-
-URL_RE = re.compile(r"^(https?://)?([a-z0-9-]+\.)+[a-z]{2,}(:\d+)?(/.*)?$", re.I)
+from .validators import is_valid_url
 
 
 class DomainSerializer(serializers.ModelSerializer):
@@ -13,7 +11,7 @@ class DomainSerializer(serializers.ModelSerializer):
 
 	def validate_url(self, v: str) -> str:
 		v = (v or "").strip()
-		if not URL_RE.match(v):
+		if not is_valid_url(v):
 			raise serializers.ValidationError("Enter a valid URL like https://example.com")
 		if v.endswith("/") and v.count("/") > 2:
 			v = v.rstrip("/")
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import CookieCategory, Domain
+
+
+@receiver(post_save, sender=CookieCategory)
+@receiver(post_delete, sender=CookieCategory)
+def touch_domain_on_category_change(sender, instance, **kwargs):
+	# Bumping updated_at rolls the cookie category list cache key (see cookie_categories_list)
+	Domain.objects.filter(pk=instance.domain_id).update(updated_at=timezone.now())
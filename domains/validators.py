@@ -0,0 +1,63 @@
+# domains/validators.py
+import re
+from .models import CookieCategory
+
+# Matched against the lowercased URL, so no re.I case-folding is needed.
+# Bounded repeats keep matching linear on hostile input; MAX_URL_LENGTH caps the rest.
+URL_RE = re.compile(
+	r"^(?:https?://)?(?:[a-z0-9-]{1,63}\.){1,10}[a-z]{2,63}(?::\d{1,5})?(?:/.*)?$",
+	re.ASCII,
+)
+MAX_URL_LENGTH = 2048
+
+
+def normalize_url(raw) -> str:
+	"""Strip whitespace and trailing slashes from user input."""
+	return (raw or "").strip().rstrip("/")
+
+
+def is_valid_url(url: str) -> bool:
+	"""Check a domain URL like https://example.com (scheme optional)."""
+	if len(url) > MAX_URL_LENGTH:
+		return False
+	return URL_RE.match(url.lower()) is not None
+
+
+# --- Cookie categories (hand-rolled instead of CookieCategorySerializer on writes) ---
+
+# Derived from the model so the fast path can't drift from the ModelSerializer's rules
+COOKIE_CATEGORIES = frozenset(c for c, _ in CookieCategory.CATEGORY_CHOICES)
+# field -> (required, max_length)
+_CC_FIELDS = {
+	"category": (True, None),
+	"script_name": (True, CookieCategory._meta.get_field("script_name").max_length),
+	"script_pattern": (True, None),
+	"description": (False, None),
+}
+
+
+def clean_cookie_category(data, partial: bool = False) -> tuple[dict, dict]:
+	"""
+	Validate a cookie category payload the way the ModelSerializer would.
+	Returns (cleaned, errors); errors uses DRF's {field: [messages]} shape.
+	"""
+	cleaned, errors = {}, {}
+	for field, (required, max_length) in _CC_FIELDS.items():
+		if field not in data:
+			if required and not partial:
+				errors[field] = ["This field is required."]
+			continue
+		value = data[field]
+		if not isinstance(value, str):
+			errors[field] = ["This field may not be null."] if value is None else ["Not a valid string."]
+			continue
+		value = value.strip()
+		if required and not value:
+			errors[field] = ["This field may not be blank."]
+		elif max_length and len(value) > max_length:
+			errors[field] = [f"Ensure this field has no more than {max_length} characters."]
+		elif field == "category" and value not in COOKIE_CATEGORIES:
+			errors[field] = [f'"{value}" is not a valid choice.']
+		else:
+			cleaned[field] = value
+	return cleaned, errors
@@ -1,37 +1,75 @@
 # domains/views.py
-import re, secrets
+from operator import attrgetter
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Now
+from django.http import Http404, StreamingHttpResponse
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from drf_spectacular.utils import extend_schema
-from .models import Domain, CookieCategory
+from .models import Domain, CookieCategory, generate_embed_key
 from .serializers import CookieCategorySerializer
-from billing.guards import get_user_plan, get_domain_limit, can_use_feature
+from .validators import normalize_url, is_valid_url, clean_cookie_category
+from billing.guards import plan_of, limit_of, feature_of
+from cookieguard.renderers import stream_json_object
 from scanner.tasks import run_scan_task
 from scanner.models import ScanResult
 
-URL_RE = re.compile(r"^(https?://)?([a-z0-9-]+\.)+[a-z]{2,}(:\d+)?(/.*)?$", re.I)
+User = get_user_model()
+
+
+DOMAIN_FIELDS = (
+	"id", "url", "embed_key", "created_at", "updated_at", "last_scan_at",
+	"industry", "is_ready", "user_id", "created_by_id",
+)
+
+
+# Response keys, positionally matching DOMAIN_FIELDS (FK ids drop their "_id")
+DOMAIN_KEYS = (
+	"id", "url", "embed_key", "created_at", "updated_at", "last_scan_at",
+	"industry", "is_ready", "user", "created_by",
+)
+_domain_attrs = attrgetter(*DOMAIN_FIELDS)
+
+
+# Datetimes/UUIDs are left as-is; ORJSONRenderer encodes them natively
+def _serialize_row(values: tuple):
+	"""One .values_list(*DOMAIN_FIELDS) row -> response dict."""
+	return dict(zip(DOMAIN_KEYS, values))
 
 
 def _serialize(d: Domain):
+	return _serialize_row(_domain_attrs(d))
+
+
+def _serialize_category(c: CookieCategory):
 	return {
-		"id": str(d.id),
-		"url": d.url,
-		"embed_key": d.embed_key,
-		"created_at": d.created_at.isoformat(),
-		"updated_at": d.updated_at.isoformat(),
-		"last_scan_at": d.last_scan_at.isoformat() if d.last_scan_at else None,
-		"industry": d.industry,
-		"is_ready": d.is_ready,
-		"user": d.user_id and str(d.user_id),
-		"created_by": d.created_by_id and str(d.created_by_id),
+		"id": c.id,
+		"domain": c.domain_id,
+		"category": c.category,
+		"script_name": c.script_name,
+		"script_pattern": c.script_pattern,
+		"description": c.description,
+		"created_at": c.created_at,
 	}
 
 
+CATEGORY_CACHE_TTL = 3600  # 1 hour
+
+CC_UNIQUE_ERROR = {"non_field_errors": ["The fields domain, script_name must make a unique set."]}
+
+
 def _get_owned(request, **kwargs) -> Domain:
-	return get_object_or_404(Domain, user=request.user, **kwargs)
+	"""
+	Ownership check that loads only what callers use: the id (for filters,
+	FKs and delete) and updated_at (category cache key). Reads of other
+	fields go through .values_list(*DOMAIN_FIELDS) instead.
+	"""
+	return get_object_or_404(Domain.objects.only("id", "updated_at"), user=request.user, **kwargs)
 
 
 @extend_schema(
@@ -50,40 +88,49 @@ def _get_owned(request, **kwargs) -> Domain:
 @api_view(["GET", "POST"])
 def domains_list(request):
 	if request.method == "GET":
-		qs = Domain.objects.filter(user=request.user).order_by("-created_at")
-		return Response([_serialize(d) for d in qs])
+		# Plain tuples - no model instances for a list view. Related users are
+		# exposed by id only, so there's nothing to join; if a row ever needs
+		# user/created_by fields, add e.g. "user__email" to DOMAIN_FIELDS/DOMAIN_KEYS (one JOIN, no N+1).
+		rows = Domain.objects.filter(user=request.user).order_by("-created_at").values_list(*DOMAIN_FIELDS)
+		keys = DOMAIN_KEYS
+		return Response([dict(zip(keys, row)) for row in rows])
 
 	# POST (create)
-	# Check domain limit before creating
-	current_count = Domain.objects.filter(user=request.user).count()
-	domain_limit = get_domain_limit(request.user)
-	plan = get_user_plan(request.user)
-
-	if current_count >= domain_limit:
-		return Response(
-			{
-				"detail": f"Your {plan.title()} plan allows {domain_limit} domain(s). Please upgrade to add more.",
-				"code": "domain_limit_reached",
-				"current": current_count,
-				"limit": domain_limit,
-			},
-			status=status.HTTP_403_FORBIDDEN
-		)
-
-	url = (request.data.get("url") or "").strip().rstrip("/") or ""
-	if not URL_RE.match(url):
+	url = normalize_url(request.data.get("url"))
+	if not is_valid_url(url):
 		return Response({"url": ["Enter a valid URL like https://example.com"]}, status=400)
 
 	industry = (request.data.get("industry") or "").strip()
 	if industry and len(industry) > 120:
 		return Response({"industry": ["Max length is 120 characters."]}, status=400)
 
-	d = Domain.objects.create(
-		user=request.user,
-		created_by=request.user,
-		url=url,
-		industry=industry or None,
-	)
+	plan, domain_limit = plan_of(request), limit_of(request, "domains")
+
+	# Lock the owner row so concurrent creates can't both pass the limit check
+	with transaction.atomic():
+		User.objects.select_for_update().filter(pk=request.user.pk).first()
+		owned = Domain.objects.filter(user=request.user)
+		# LIMIT-ed probe on the user_id index instead of a full COUNT(*)
+		at_limit = len(owned.values_list("pk", flat=True)[:domain_limit]) >= domain_limit
+
+		if at_limit:
+			current_count = owned.count()  # exact figure only for the error body
+			return Response(
+				{
+					"detail": f"Your {plan.title()} plan allows {domain_limit} domain(s). Please upgrade to add more.",
+					"code": "domain_limit_reached",
+					"current": current_count,
+					"limit": domain_limit,
+				},
+				status=status.HTTP_403_FORBIDDEN
+			)
+
+		d = Domain.objects.create(
+			user=request.user,
+			created_by=request.user,
+			url=url,
+			industry=industry or None,
+		)
 	return Response(_serialize(d), status=status.HTTP_201_CREATED)
 
 
@@ -108,53 +155,66 @@ def domains_list(request):
 )
 @api_view(["GET", "PATCH", "DELETE"])
 def domain_detail(request, id):
-	d = _get_owned(request, id=id)
-
-	if request.method == "GET":
-		return Response(_serialize(d))
-
 	if request.method == "PATCH":
-		updated_fields = []
-
-		# url (optional)
-		if "url" in request.data:
-			url = (request.data.get("url") or "").strip().rstrip("/")
-			if not url:
-				return Response({"url": ["This field may not be blank."]}, status=400)
-			if not URL_RE.match(url):
-				return Response({"url": ["Enter a valid URL like https://example.com"]}, status=400)
-			d.url = url
-			updated_fields += ["url"]
-
-		# industry (optional free text)
-		if "industry" in request.data:
-			industry = (request.data.get("industry") or "").strip()
-			if not industry:
-				return Response({"industry": ["This field may not be blank."]}, status=400)
-			if len(industry) > 120:
-				return Response({"industry": ["Max length is 120 characters."]}, status=400)
-			d.industry = industry
-			updated_fields += ["industry"]
-
-		# mark ready toggle
-		if "is_ready" in request.data:
-			is_ready = bool(request.data.get("is_ready"))
-			if is_ready and not d.industry:
-				return Response({"detail": "Set industry before marking ready."}, status=400)
-			d.is_ready = is_ready
-			updated_fields += ["is_ready"]
+		return _patch_domain(request, id)
 
-		if updated_fields:
-			updated_fields.append("updated_at")
-			d.save(update_fields=updated_fields)
+	if request.method == "GET":
+		row = Domain.objects.filter(user=request.user, id=id).values_list(*DOMAIN_FIELDS).first()
+		if row is None:
+			raise Http404
+		return Response(_serialize_row(row))
 
-		return Response(_serialize(d))
+	d = _get_owned(request, id=id)
 
 	# DELETE
 	d.delete()
 	return Response(status=204)
 
 
+def _patch_domain(request, id):
+	"""Validate without touching the DB, then apply as one filtered UPDATE."""
+	to_set = {}
+
+	# url (optional)
+	if "url" in request.data:
+		url = normalize_url(request.data.get("url"))
+		if not url:
+			return Response({"url": ["This field may not be blank."]}, status=400)
+		if not is_valid_url(url):
+			return Response({"url": ["Enter a valid URL like https://example.com"]}, status=400)
+		to_set["url"] = url
+
+	# industry (optional free text)
+	if "industry" in request.data:
+		industry = (request.data.get("industry") or "").strip()
+		if not industry:
+			return Response({"industry": ["This field may not be blank."]}, status=400)
+		if len(industry) > 120:
+			return Response({"industry": ["Max length is 120 characters."]}, status=400)
+		to_set["industry"] = industry
+
+	owned = Domain.objects.filter(user=request.user, id=id)
+
+	# mark ready toggle
+	needs_industry = False
+	if "is_ready" in request.data:
+		to_set["is_ready"] = bool(request.data.get("is_ready"))
+		# Industry must already be set unless this same request sets it
+		needs_industry = to_set["is_ready"] and "industry" not in to_set
+
+	if to_set:
+		target = owned.exclude(industry__isnull=True).exclude(industry="") if needs_industry else owned
+		if not target.update(**to_set, updated_at=Now()):
+			if needs_industry and owned.exists():
+				return Response({"detail": "Set industry before marking ready."}, status=400)
+			raise Http404
+
+	row = owned.values_list(*DOMAIN_FIELDS).first()
+	if row is None:
+		raise Http404
+	return Response(_serialize_row(row))
+
+
 @extend_schema(
 	responses={200: {"type": "object", "properties": {"embed_key": {"type": "string"}}}},
 	description="Rotate the embed key for a domain",
@@ -162,10 +222,11 @@ def domain_detail(request, id):
 )
 @api_view(["POST"])
 def rotate_key(request, id):
-	d = _get_owned(request, id=id)
-	d.embed_key = secrets.token_urlsafe(24)[:40]
-	d.save(update_fields=["embed_key", "updated_at"])
-	return Response({"embed_key": d.embed_key})
+	# Ownership is part of the filter: one UPDATE, no SELECT or model save()
+	key = generate_embed_key()
+	if not Domain.objects.filter(id=id, user=request.user).update(embed_key=key, updated_at=timezone.now()):
+		raise Http404
+	return Response({"embed_key": key})
 
 
 @extend_schema(
@@ -183,22 +244,25 @@ def run_scan(request, id):
 	Trigger a manual scan for the user's domain.
 	Queues the scan via Celery and returns a task_id for polling.
 	"""
-	d = _get_owned(request, id=id)
+	owned = Domain.objects.filter(id=id, user=request.user)
+	url = owned.values_list("url", flat=True).first()
+	if url is None:
+		raise Http404
 
 	# Queue the scan via Celery with save_result=True to store in database
 	task = run_scan_task.delay(
-		d.url,
-		domain_id=str(d.id),
+		url,
+		domain_id=str(id),
 		save_result=True,
 	)
 
-	d.last_scan_at = timezone.now()
-	d.save(update_fields=["last_scan_at", "updated_at"])
+	now = timezone.now()
+	owned.update(last_scan_at=now, updated_at=now)
 
 	return Response({
 		"status": "queued",
 		"task_id": task.id,
-		"last_scan_at": d.last_scan_at.isoformat(),
+		"last_scan_at": now,
 	})
 
 
@@ -221,11 +285,19 @@ def cookie_categories_list(request, domain_id):
 
 	if request.method == "GET":
 		categories = CookieCategory.objects.filter(domain=domain).order_by("category", "script_name")
-		serializer = CookieCategorySerializer(categories, many=True)
-		return Response(serializer.data)
+		if request.GET.get("summary"):
+			# Lightweight listing for counts/pickers; skips the pattern text and DRF
+			return Response(list(categories.values("id", "category", "script_name")))
+		# Keyed on updated_at, which category saves/deletes bump (domains/signals.py)
+		key = f"cc:{domain.id}:{domain.updated_at.timestamp()}"
+		data = cache.get(key)
+		if data is None:
+			data = CookieCategorySerializer(categories, many=True).data
+			cache.set(key, data, CATEGORY_CACHE_TTL)
+		return Response(data)
 
 	# POST - create new category (requires Pro+ plan)
-	if not can_use_feature(request.user, "cookie_categorization"):
+	if not feature_of(request, "cookie_categorization"):
 		return Response(
 			{
 				"detail": "Cookie categorization requires a Pro or Agency plan.",
@@ -234,11 +306,15 @@ def cookie_categories_list(request, domain_id):
 			status=status.HTTP_403_FORBIDDEN
 		)
 
-	serializer = CookieCategorySerializer(data=request.data)
-	if serializer.is_valid():
-		serializer.save(domain=domain)
-		return Response(serializer.data, status=status.HTTP_201_CREATED)
-	return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+	cleaned, errors = clean_cookie_category(request.data)
+	if errors:
+		return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+	try:
+		with transaction.atomic():
+			category = CookieCategory.objects.create(domain=domain, **cleaned)
+	except IntegrityError:
+		return Response(CC_UNIQUE_ERROR, status=status.HTTP_400_BAD_REQUEST)
+	return Response(_serialize_category(category), status=status.HTTP_201_CREATED)
 
 
 @extend_schema(
@@ -270,7 +346,7 @@ def cookie_category_detail(request, domain_id, category_id):
 		return Response(serializer.data)
 
 	# PATCH and DELETE require Pro+ plan
-	if not can_use_feature(request.user, "cookie_categorization"):
+	if not feature_of(request, "cookie_categorization"):
 		return Response(
 			{
 				"detail": "Cookie categorization requires a Pro or Agency plan.",
@@ -280,17 +356,31 @@ def cookie_category_detail(request, domain_id, category_id):
 		)
 
 	if request.method == "PATCH":
-		serializer = CookieCategorySerializer(category, data=request.data, partial=True)
-		if serializer.is_valid():
-			serializer.save()
-			return Response(serializer.data)
-		return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+		cleaned, errors = clean_cookie_category(request.data, partial=True)
+		if errors:
+			return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+		for field, value in cleaned.items():
+			setattr(category, field, value)
+		if cleaned:
+			try:
+				with transaction.atomic():
+					category.save(update_fields=list(cleaned))
+			except IntegrityError:
+				return Response(CC_UNIQUE_ERROR, status=status.HTTP_400_BAD_REQUEST)
+		return Response(_serialize_category(category))
 
 	# DELETE
 	category.delete()
 	return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+SCAN_SUMMARY_FIELDS = (
+	"id", "url", "scanned_at", "cookies_found", "first_party_count", "third_party_count",
+	"tracker_count", "unclassified_count", "compliance_score", "has_consent_banner",
+	"pages_scanned", "duration",
+)
+
+
 @extend_schema(
 	responses={200: {"type": "object", "properties": {
 		"scans": {"type": "array"},
@@ -304,28 +394,20 @@ def scan_history(request, id):
 	"""Get all past scans for a domain with summary info."""
 	d = _get_owned(request, id=id)
 
-	scans = ScanResult.objects.filter(domain=d).order_by("-scanned_at")[:50]
+	# Projected rows, materialized once; total is the length of this page
+	# (what the old sliced .count() returned). ORJSONRenderer handles UUID/datetime.
+	scans = list(
+		ScanResult.objects.filter(domain=d)
+		.order_by("-scanned_at")
+		.values(*SCAN_SUMMARY_FIELDS, "issues")[:50]
+	)
+	for scan in scans:
+		issues = scan.pop("issues")
+		scan["issues_count"] = len(issues) if issues else 0
 
 	return Response({
-		"scans": [
-			{
-				"id": str(scan.id),
-				"url": scan.url,
-				"scanned_at": scan.scanned_at.isoformat(),
-				"cookies_found": scan.cookies_found,
-				"first_party_count": scan.first_party_count,
-				"third_party_count": scan.third_party_count,
-				"tracker_count": scan.tracker_count,
-				"unclassified_count": scan.unclassified_count,
-				"compliance_score": scan.compliance_score,
-				"has_consent_banner": scan.has_consent_banner,
-				"pages_scanned": scan.pages_scanned,
-				"duration": scan.duration,
-				"issues_count": len(scan.issues) if scan.issues else 0,
-			}
-			for scan in scans
-		],
-		"total": scans.count(),
+		"scans": scans,
+		"total": len(scans),
 	})
 
 
@@ -339,35 +421,15 @@ def latest_scan(request, id):
 	"""Get the most recent scan result with full cookie details."""
 	d = _get_owned(request, id=id)
 
-	scan = ScanResult.objects.filter(domain=d).first()
+	# The raw crawl payload (result) isn't part of this response
+	scan = ScanResult.objects.filter(domain=d).defer("result").first()
 	if not scan:
 		return Response({"error": "No scans found for this domain"}, status=404)
 
-	# Get cookies with their classifications
-	cookies = scan.cookies.all()
-	cookies_data = [
-		{
-			"id": cookie.id,
-			"name": cookie.name,
-			"domain": cookie.domain,
-			"path": cookie.path,
-			"expires": cookie.expires,
-			"type": cookie.type,
-			"category": cookie.get_effective_category(),
-			"classification": cookie.classification,
-			"user_category": cookie.user_category,
-			"user_description": cookie.user_description,
-			"has_definition": cookie.definition is not None,
-			"definition_confidence": cookie.definition.classification_confidence if cookie.definition else 0,
-			"provider": cookie.definition.provider if cookie.definition else None,
-		}
-		for cookie in cookies
-	]
-
-	return Response({
-		"id": str(scan.id),
+	head = {
+		"id": scan.id,
 		"url": scan.url,
-		"scanned_at": scan.scanned_at.isoformat(),
+		"scanned_at": scan.scanned_at,
 		"cookies_found": scan.cookies_found,
 		"first_party_count": scan.first_party_count,
 		"third_party_count": scan.third_party_count,
@@ -378,5 +440,29 @@ def latest_scan(request, id):
 		"pages_scanned": scan.pages_scanned,
 		"duration": scan.duration,
 		"issues": scan.issues,
-		"cookies": cookies_data,
-	})
+	}
+	# Cookies with their classifications (definitions joined in), streamed in batches
+	cookies = scan.cookies.select_related("definition").iterator(chunk_size=500)
+	return StreamingHttpResponse(
+		stream_json_object(head, "cookies", (_serialize_scan_cookie(c) for c in cookies)),
+		content_type="application/json",
+	)
+
+
+def _serialize_scan_cookie(cookie):
+	definition = cookie.definition
+	return {
+		"id": cookie.id,
+		"name": cookie.name,
+		"domain": cookie.domain,
+		"path": cookie.path,
+		"expires": cookie.expires,
+		"type": cookie.type,
+		"category": cookie.get_effective_category(),
+		"classification": cookie.classification,
+		"user_category": cookie.user_category,
+		"user_description": cookie.user_description,
+		"has_definition": definition is not None,
+		"definition_confidence": definition.classification_confidence if definition else 0,
+		"provider": definition.provider if definition else None,
+	}
@@ -0,0 +1,127 @@
+# scanner/browser_config.py
+"""
+Browser launch settings and request-blocking rules shared by the
+async (browser_pool) and sync (browser_pool_sync) browser pools.
+"""
+import os
+import re
+from urllib.parse import urlsplit
+
+# Memory-optimized Chrome args
+BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-setuid-sandbox",
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-translate",
+    "--disable-default-apps",
+    "--no-first-run",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-web-security",
+    "--disable-http2",
+    # One flag: Chromium only honours the last --disable-features it sees
+    "--disable-features=IsolateOrigins,site-per-process,NetworkService,PrefetchPrivacyChanges,"
+    "Translate,BackForwardCache,AcceptCHFrame,InterestCohort",
+    "--disable-ipc-flooding-protection",
+    "--memory-pressure-off",
+    "--js-flags=--max-old-space-size=128",  # Limit JS heap
+]
+
+# Matches CELERY_WORKER_CONCURRENCY (2) by default
+CONTEXT_POOL_SIZE = int(os.getenv("BROWSER_CONTEXT_POOL_SIZE", 2))
+
+# Wider viewport to capture more of the page for screenshots
+VIEWPORT = {"width": 1440, "height": 900}
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/114.0.0.0 Safari/537.36"
+)
+
+# Hide navigator.webdriver; installed once per pooled context so every page inherits it
+STEALTH_INIT_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+
+# Heavy domains to block (ads, analytics, video, chat widgets - not needed for cookie scanning)
+BLOCKED_DOMAINS = [
+    "googletagmanager.com",
+    "google-analytics.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "facebook.net",
+    "facebook.com/tr",
+    "connect.facebook.net",
+    "analytics.tiktok.com",
+    "snap.licdn.com",
+    "ads.linkedin.com",
+    "bat.bing.com",
+    "clarity.ms",
+    "hotjar.com",
+    "fullstory.com",
+    "heapanalytics.com",
+    "segment.io",
+    "segment.com",
+    "mixpanel.com",
+    "amplitude.com",
+    "intercom.io",
+    "intercomcdn.com",
+    "drift.com",
+    "crisp.chat",
+    "zendesk.com",
+    "zopim.com",
+    "tawk.to",
+    "livechatinc.com",
+    "youtube.com",
+    "youtube-nocookie.com",
+    "vimeo.com",
+    "wistia.com",
+    "vidyard.com",
+    "player.vimeo.com",
+    "sentry.io",
+    "bugsnag.com",
+    "logrocket.com",
+    "newrelic.com",
+    "nr-data.net",
+    "optimizely.com",
+    "abtasty.com",
+    "crazyegg.com",
+    "mouseflow.com",
+    "trustpilot.com",
+    "recaptcha.net",
+    "gstatic.com/recaptcha",
+    "hcaptcha.com",
+]
+
+# Plain hosts are matched by hash lookup on the request's host and its parent domains;
+# only the path-bearing entries (e.g. facebook.com/tr) still need a substring match.
+BLOCKED_HOSTS = frozenset(d for d in BLOCKED_DOMAINS if "/" not in d)
+BLOCKED_PATH_RE = re.compile("|".join(re.escape(d) for d in BLOCKED_DOMAINS if "/" in d))
+
+# Playwright resource types never needed to audit cookies. Images stay allowed for screenshots;
+# scripts and XHR are what set the tracker cookies we count.
+BLOCKED_RESOURCE_TYPES = frozenset({"media", "font"})
+
+# Fonts, media and PDFs (optionally followed by a query string)
+HEAVY_RESOURCE_RE = re.compile(r"\.(?:woff2?|ttf|eot|mp[34]|webm|wav|ogg|avi|mov|pdf)(?:\?|$)")
+
+
+def is_blocked_url(url: str) -> bool:
+    """True if the (lowercased) URL's host or one of its parent domains is blocked."""
+    parts = (urlsplit(url).hostname or "").split(".")
+    for i in range(len(parts) - 1):
+        if ".".join(parts[i:]) in BLOCKED_HOSTS:
+            return True
+    return BLOCKED_PATH_RE.search(url) is not None
+
+
+def should_block(url: str, resource_type: str = "") -> bool:
+    """Route-handler check on the lowercased URL: heavy resource or blocked domain."""
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    return HEAVY_RESOURCE_RE.search(url) is not None or is_blocked_url(url)
@@ -7,6 +7,10 @@ import asyncio
 import logging
 from playwright.async_api import async_playwright, Browser, Playwright
 
+from scanner.browser_config import (
+    BROWSER_ARGS, CONTEXT_POOL_SIZE, STEALTH_INIT_SCRIPT, USER_AGENT, VIEWPORT, should_block,
+)
+
 logger = logging.getLogger("scanner")
 
 # Singleton state
@@ -14,45 +18,30 @@ _playwright: Playwright | None = None
 _browser: Browser | None = None
 _lock = asyncio.Lock()
 
-# Memory-optimized Chrome args
-BROWSER_ARGS = [
-    "--no-sandbox",
-    "--disable-dev-shm-usage",
-    "--disable-setuid-sandbox",
-    "--disable-gpu",
-    "--disable-software-rasterizer",
-    "--disable-extensions",
-    "--disable-background-networking",
-    "--disable-sync",
-    "--disable-translate",
-    "--disable-default-apps",
-    "--no-first-run",
-    "--disable-blink-features=AutomationControlled",
-    "--disable-web-security",
-    "--disable-features=IsolateOrigins,site-per-process",
-    "--disable-http2",
-    "--disable-features=NetworkService,PrefetchPrivacyChanges",
-    "--single-process",  # Reduces memory by running in single process
-    "--memory-pressure-off",
-    "--js-flags=--max-old-space-size=128",  # Limit JS heap
-]
-
-# Wider viewport to capture more of the page for screenshots
-VIEWPORT = {"width": 1440, "height": 900}
-
-USER_AGENT = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/114.0.0.0 Safari/537.36"
-)
+# Ready contexts (pre-created in the background, capped at CONTEXT_POOL_SIZE)
+_idle_contexts: asyncio.Queue | None = None
+_refilling = False
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _get_idle_queue() -> asyncio.Queue:
+    global _idle_contexts
+    if _idle_contexts is None:
+        _idle_contexts = asyncio.Queue()
+    return _idle_contexts
 
 
 async def get_browser() -> Browser:
     """Get or create the shared browser instance."""
     global _playwright, _browser
 
+    # Fast path: no lock while the shared browser is healthy
+    browser = _browser
+    if browser is not None and browser.is_connected():
+        return browser
+
     async with _lock:
-        # Check if browser is still alive
+        # Re-check: another caller may have relaunched it while we waited
         if _browser is not None and _browser.is_connected():
             return _browser
 
@@ -82,90 +71,98 @@ async def get_browser() -> Browser:
         return _browser
 
 
-# Heavy domains to block (ads, analytics, video, chat widgets - not needed for cookie scanning)
-BLOCKED_DOMAINS = [
-    "googletagmanager.com",
-    "google-analytics.com",
-    "doubleclick.net",
-    "googlesyndication.com",
-    "googleadservices.com",
-    "facebook.net",
-    "facebook.com/tr",
-    "connect.facebook.net",
-    "analytics.tiktok.com",
-    "snap.licdn.com",
-    "ads.linkedin.com",
-    "bat.bing.com",
-    "clarity.ms",
-    "hotjar.com",
-    "fullstory.com",
-    "heapanalytics.com",
-    "segment.io",
-    "segment.com",
-    "mixpanel.com",
-    "amplitude.com",
-    "intercom.io",
-    "intercomcdn.com",
-    "drift.com",
-    "crisp.chat",
-    "zendesk.com",
-    "zopim.com",
-    "tawk.to",
-    "livechatinc.com",
-    "youtube.com",
-    "youtube-nocookie.com",
-    "vimeo.com",
-    "wistia.com",
-    "vidyard.com",
-    "player.vimeo.com",
-    "sentry.io",
-    "bugsnag.com",
-    "logrocket.com",
-    "newrelic.com",
-    "nr-data.net",
-    "optimizely.com",
-    "abtasty.com",
-    "crazyegg.com",
-    "mouseflow.com",
-    "trustpilot.com",
-    "recaptcha.net",
-    "gstatic.com/recaptcha",
-    "hcaptcha.com",
-]
-
-
-async def get_context():
-    """
-    Get a new browser context from the shared browser.
-    Caller is responsible for closing the context when done.
-    """
-    browser = await get_browser()
+async def _new_context(browser: Browser):
+    """Create a context with the request router and stealth script installed (once per context)."""
     context = await browser.new_context(
         user_agent=USER_AGENT,
         viewport=VIEWPORT,
         bypass_csp=True,
     )
 
-    # Block fonts, media, and other heavy resources (but allow images for screenshots)
-    await context.route(
-        "**/*.{woff,woff2,ttf,eot,mp4,webm,mp3,wav,ogg,avi,mov,pdf}",
-        lambda route: route.abort()
-    )
-
-    # Block heavy third-party domains (ads, analytics, video, chat)
+    # Single route handler (one Playwright round-trip per request): block fonts/media
+    # (images stay allowed for screenshots) and heavy third-party domains (ads, analytics, video, chat)
     async def block_heavy_domains(route):
-        url = route.request.url.lower()
-        for domain in BLOCKED_DOMAINS:
-            if domain in url:
-                await route.abort()
-                return
+        request = route.request
+        if should_block(request.url.lower(), request.resource_type):
+            await route.abort()
+            return
         await route.continue_()
 
     await context.route("**/*", block_heavy_domains)
+    await context.add_init_script(STEALTH_INIT_SCRIPT)
 
     return context
 
 
+async def _close_quietly(context):
+    try:
+        await context.close()
+    except Exception:
+        pass
+
+
+def _spawn(coro):
+    """Run a pool housekeeping coroutine in the background, holding a reference until done."""
+    task = asyncio.get_running_loop().create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _refill():
+    """Top the idle queue back up to CONTEXT_POOL_SIZE with fresh contexts."""
+    global _refilling
+    if _refilling:
+        return
+    _refilling = True
+    try:
+        idle = _get_idle_queue()
+        while idle.qsize() < CONTEXT_POOL_SIZE:
+            browser = await get_browser()
+            idle.put_nowait(await _new_context(browser))
+    except Exception as e:
+        logger.debug("[browser_pool] Context refill failed: %s", e)
+    finally:
+        _refilling = False
+
+
+async def get_context():
+    """
+    Get a browser context from the pool; normally a pre-created one, so this is
+    a queue pop. Falls back to creating one inline if the pool is empty.
+    Either way it has never been used (released contexts are closed, not
+    re-queued), so cookies, storage, service workers and cache start empty.
+    Hand it back with release_context() when done.
+    """
+    browser = await get_browser()
+    idle = _get_idle_queue()
+    try:
+        while not idle.empty():
+            context = idle.get_nowait()
+            # Drop contexts left over from a browser that has since been relaunched
+            if context.browser is browser:
+                return context
+            await _close_quietly(context)
+        return await _new_context(browser)
+    finally:
+        _spawn(_refill())
+
+
+async def _discard(context):
+    # Never re-queue a used context: clear_cookies() alone leaves localStorage,
+    # sessionStorage, IndexedDB, service workers and the HTTP cache behind (e.g. a
+    # consent saved by the crawler's Accept pass). _refill() replaces it with a fresh one.
+    await _close_quietly(context)
+    _spawn(_refill())
+
+
+async def release_context(context):
+    """
+    Hand a context back when done. It is closed (not reused) in the background
+    so the caller doesn't wait; the pool pre-creates a fresh one in its place.
+    """
+    _spawn(_discard(context))
+
+
 async def close_browser():
     """Explicitly close the browser (for shutdown)."""
     global _playwright, _browser
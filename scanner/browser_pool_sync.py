@@ -4,9 +4,14 @@ Synchronous browser pool for Celery workers.
 Uses sync_playwright which works better with Celery on Windows.
 """
 import logging
+import queue
 import threading
 from playwright.sync_api import sync_playwright, Browser, Playwright
 
+from scanner.browser_config import (
+    BROWSER_ARGS, CONTEXT_POOL_SIZE, STEALTH_INIT_SCRIPT, USER_AGENT, VIEWPORT, should_block,
+)
+
 logger = logging.getLogger("scanner")
 
 # Singleton state
@@ -14,61 +19,21 @@ _playwright: Playwright | None = None
 _browser: Browser | None = None
 _lock = threading.Lock()
 
-# Memory-optimized Chrome args
-BROWSER_ARGS = [
-    "--no-sandbox",
-    "--disable-dev-shm-usage",
-    "--disable-setuid-sandbox",
-    "--disable-gpu",
-    "--disable-software-rasterizer",
-    "--disable-extensions",
-    "--disable-background-networking",
-    "--disable-sync",
-    "--disable-translate",
-    "--disable-default-apps",
-    "--no-first-run",
-    "--disable-blink-features=AutomationControlled",
-    "--disable-web-security",
-    "--disable-features=IsolateOrigins,site-per-process",
-    "--disable-http2",
-    "--disable-features=NetworkService,PrefetchPrivacyChanges",
-    "--single-process",
-    "--memory-pressure-off",
-    "--js-flags=--max-old-space-size=128",
-]
-
-VIEWPORT = {"width": 1440, "height": 900}
-
-USER_AGENT = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/114.0.0.0 Safari/537.36"
-)
-
-# Heavy domains to block
-BLOCKED_DOMAINS = [
-    "googletagmanager.com", "google-analytics.com", "doubleclick.net",
-    "googlesyndication.com", "googleadservices.com", "facebook.net",
-    "facebook.com/tr", "connect.facebook.net", "analytics.tiktok.com",
-    "snap.licdn.com", "ads.linkedin.com", "bat.bing.com", "clarity.ms",
-    "hotjar.com", "fullstory.com", "heapanalytics.com", "segment.io",
-    "segment.com", "mixpanel.com", "amplitude.com", "intercom.io",
-    "intercomcdn.com", "drift.com", "crisp.chat", "zendesk.com",
-    "zopim.com", "tawk.to", "livechatinc.com", "youtube.com",
-    "youtube-nocookie.com", "vimeo.com", "wistia.com", "vidyard.com",
-    "player.vimeo.com", "sentry.io", "bugsnag.com", "logrocket.com",
-    "newrelic.com", "nr-data.net", "optimizely.com", "abtasty.com",
-    "crazyegg.com", "mouseflow.com", "trustpilot.com", "recaptcha.net",
-    "gstatic.com/recaptcha", "hcaptcha.com",
-]
+# Fresh, never-used contexts ready for the next scan (capped at CONTEXT_POOL_SIZE)
+_idle_contexts: queue.Queue = queue.Queue()
 
 
 def get_browser() -> Browser:
     """Get or create the shared browser instance."""
     global _playwright, _browser
 
+    # Fast path: no lock while the shared browser is healthy
+    browser = _browser
+    if browser is not None and browser.is_connected():
+        return browser
+
     with _lock:
-        # Check if browser is still alive
+        # Re-check: another caller may have relaunched it while we waited
         if _browser is not None and _browser.is_connected():
             return _browser
 
@@ -98,38 +63,66 @@ def get_browser() -> Browser:
         return _browser
 
 
-def get_context():
-    """
-    Get a new browser context from the shared browser.
-    Caller is responsible for closing the context when done.
-    """
-    browser = get_browser()
+def _new_context(browser: Browser):
+    """Create a context with the request router and stealth script installed (once per context)."""
     context = browser.new_context(
         user_agent=USER_AGENT,
         viewport=VIEWPORT,
         bypass_csp=True,
     )
 
-    # Block fonts, media, and other heavy resources (but allow images for screenshots)
-    context.route(
-        "**/*.{woff,woff2,ttf,eot,mp4,webm,mp3,wav,ogg,avi,mov,pdf}",
-        lambda route: route.abort()
-    )
-
-    # Block heavy third-party domains
+    # Single route handler (one Playwright round-trip per request): block fonts/media
+    # (images stay allowed for screenshots) and heavy third-party domains (ads, analytics, video, chat)
     def block_heavy_domains(route):
-        url = route.request.url.lower()
-        for domain in BLOCKED_DOMAINS:
-            if domain in url:
-                route.abort()
-                return
+        request = route.request
+        if should_block(request.url.lower(), request.resource_type):
+            route.abort()
+            return
         route.continue_()
 
     context.route("**/*", block_heavy_domains)
+    context.add_init_script(STEALTH_INIT_SCRIPT)
 
     return context
 
 
+def get_context():
+    """
+    Get a pre-created browser context from the pool (or a new one if none is idle).
+    Either way it has never been used, so cookies, storage and cache start empty.
+    Hand it back with release_context() when done.
+    """
+    browser = get_browser()
+    while not _idle_contexts.empty():
+        context = _idle_contexts.get_nowait()
+        # Drop contexts left over from a browser that has since been relaunched
+        if context.browser is browser:
+            return context
+        try:
+            context.close()
+        except Exception:
+            pass
+    return _new_context(browser)
+
+
+def release_context(context):
+    """
+    Hand a context back when done. Used contexts are closed, never reused:
+    clear_cookies() alone would leave localStorage, sessionStorage, IndexedDB,
+    service workers and the HTTP cache behind for the next scan. A fresh context
+    is pre-created in its place if the pool has room.
+    """
+    try:
+        context.close()
+    except Exception:
+        pass
+    try:
+        if _browser is not None and _idle_contexts.qsize() < CONTEXT_POOL_SIZE:
+            _idle_contexts.put_nowait(_new_context(_browser))
+    except Exception as e:
+        logger.debug("[browser_pool_sync] Context refill failed: %s", e)
+
+
 def close_browser():
     """Explicitly close the browser (for shutdown)."""
     global _playwright, _browser
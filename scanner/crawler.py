@@ -1,22 +1,57 @@
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
-from urllib.parse import urlparse, urljoin
-from tldextract import extract
-import traceback, time, logging, re
+from urllib.parse import urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
+from collections import Counter
+import asyncio, traceback, time, logging, re
 
-from scanner.browser_pool import get_context
+from scanner.browser_pool import get_context, release_context
+from scanner.hostnames import base_domain
 
 logger = logging.getLogger("scanner")
 
-TRACKING_PATTERNS = ["_ga", "_gid", "_fbp", "ajs_", "__hstc", "intercom", "_gcl_", "hubspot", "clarity"]
+# Pages crawled in parallel per site (one context, one page per worker); keep it
+# small so a 2-scan worker box isn't CPU-bound on rendering
+MAX_CRAWL_CONCURRENCY = 4
 
+# Tight per-page budget: a dead or slow host costs ~8s instead of ~38s. Waiting for "load"
+# rather than "networkidle" skips long-polling/analytics beacons that never go quiet.
+NAV_TIMEOUT_MS = 8000
+ACTION_TIMEOUT_MS = 5000
+LOAD_TIMEOUT_MS = 4000
+SETTLE_MS = 500
 
-def classify_cookie(name: str) -> str:
-	return "Tracker" if any(p in name for p in TRACKING_PATTERNS) else "Unclassified"
+# Minimum seconds between progress callbacks within the same stage (each one is a task-state write)
+PROGRESS_MIN_INTERVAL = 0.5
+
+TRACKING_PATTERNS = ["_ga", "_gid", "_fbp", "ajs_", "__hstc", "intercom", "_gcl_", "hubspot", "clarity"]
+_TRACKING_RE = re.compile("|".join(map(re.escape, TRACKING_PATTERNS)))
+
+# One case-insensitive pass over the page HTML instead of lowercasing a multi-MB string per page
+_BANNER_RE = re.compile(r"cookie|consent|gdpr|manage preferences", re.IGNORECASE)
+# One page.evaluate per page: the banner test runs in the page (only a bool crosses CDP, not the
+# serialized HTML) and links come back in the same round trip. Matches against the markup (not
+# innerText) so CMP script tags/attributes still count. Links are resolved, stripped of fragments,
+# limited to http(s) (and to `host` when given) and deduped in the page; skipped at max depth.
+_PAGE_PROBE_JS = f"""({{wantLinks, host}}) => {{
+	const links = new Set();
+	if (wantLinks) {{
+		for (const a of document.querySelectorAll('a[href]')) {{
+			try {{
+				const u = new URL(a.getAttribute('href'), document.baseURI);
+				if ((u.protocol !== 'http:' && u.protocol !== 'https:') || (host && u.hostname !== host)) continue;
+				u.hash = '';
+				links.add(u.href);
+			}} catch (e) {{}}
+		}}
+	}}
+	return {{
+		hasBanner: /{_BANNER_RE.pattern}/i.test(document.documentElement ? document.documentElement.outerHTML : ''),
+		hrefs: [...links],
+	}};
+}}"""
 
 
-def base_domain(host: str) -> str:
-	parts = extract(host or "")
-	return f"{parts.domain}.{parts.suffix}" if parts.suffix else parts.domain
+def classify_cookie(name: str) -> str:
+	return "Tracker" if _TRACKING_RE.search(name) else "Unclassified"
 
 
 def same_site(host: str, start_host: str, include_subdomains: bool = False) -> bool:
@@ -26,36 +61,91 @@ def same_site(host: str, start_host: str, include_subdomains: bool = False) -> b
 	return host == start_host
 
 
-def normalize_links(hrefs: list[str], base_url: str) -> list[str]:
-	out = []
-	for href in hrefs or []:
-		if not href:
-			continue
-		if href.startswith(("mailto:", "tel:", "javascript:", "#")):
-			continue
-		absu = urljoin(base_url, href)
-		# strip fragments
-		absu = re.sub(r"#.*$", "", absu)
-		out.append(absu)
-	return list(dict.fromkeys(out))  # de-dupe, preserve order
-
-
-async def click_accept_if_present(page):
-	# best-effort "Accept all" click; extend as needed
-	selectors = [
-		'text="Accept all"', 'text="Accept All"', 'text="I accept"', 'text="Agree"',
-		'[data-testid*="accept"]', '[aria-label*="accept"]', 'button:has-text("Accept")',
-		'[id*="accept"]', '[class*="accept"]'
-	]
-	for sel in selectors:
-		try:
-			btn = await page.wait_for_selector(sel, timeout=1000)
-			if btn:
-				await btn.click()
-				await page.wait_for_load_state("networkidle", timeout=4000)
-				break
-		except Exception:
-			pass
+# Above this many cookies, classification runs on a worker thread so the event loop
+# (page workers of other scans in this process) keeps moving
+CLASSIFY_IN_THREAD_AT = 1000
+
+
+def count_cookies(cookies_list, start_base: str, kinds: dict, with_rows: bool = True):
+	"""
+	Classify cookies against the crawl's registrable domain. `kinds` caches
+	(domain, name, path) -> (type, classification) across calls, so a second pass
+	(e.g. post-consent) only classifies cookies it hasn't seen.
+	Returns (rows, first, third, tracker, unclassified).
+	"""
+	cookie_kinds = []
+	for c in cookies_list:
+		key = (c["domain"], c["name"], c.get("path", "/"))
+		kind = kinds.get(key)
+		if kind is None:
+			is_third = base_domain(c["domain"]) != start_base
+			kind = kinds[key] = ("Third-party" if is_third else "First-party", classify_cookie(c["name"]))
+		cookie_kinds.append(kind)
+
+	# Two Counter passes over the cached kinds instead of four += branches per cookie
+	types = Counter(ctype for ctype, _ in cookie_kinds)
+	track = Counter(classification for _, classification in cookie_kinds)["Tracker"]
+	cookie_rows = [
+		{
+			"name": c["name"], "domain": c["domain"], "path": c.get("path", "/"),
+			"expires": "Session" if c.get("expires", -1) == -1 else c.get("expires"),
+			"type": ctype, "classification": classification
+		}
+		for c, (ctype, classification) in zip(cookies_list, cookie_kinds)
+	] if with_rows else []
+	return cookie_rows, types["First-party"], types["Third-party"], track, len(cookie_kinds) - track
+
+
+# Query params that only tag where a visit came from; pages differing only in these are the same page
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ref", "_ga", "_gl"})
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize(url: str) -> str:
+	"""
+	Dedupe key for the crawl frontier: lowercase scheme/host, no default port or
+	fragment, tracking params dropped, remaining params sorted, no trailing slash.
+	"""
+	try:
+		parts = urlsplit(url)
+		port = parts.port
+	except ValueError:
+		return url
+	scheme = parts.scheme.lower()
+	netloc = (parts.hostname or "").lower()
+	if port and port != _DEFAULT_PORTS.get(scheme):
+		netloc = f"{netloc}:{port}"
+	query = urlencode(sorted(
+		(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+		if not k.startswith("utm_") and k not in TRACKING_PARAMS
+	))
+	return urlunsplit((scheme, netloc, parts.path.rstrip("/"), query, ""))
+
+
+# "Accept" buttons by accessible name, plus the attribute heuristics CMPs commonly use.
+# Anchored so "Disagree", "I do not agree" or "Don't accept" never count as consent.
+_ACCEPT_NAME_RE = re.compile(r"^\s*(accept( all)?|i accept|agree|i agree)\b", re.IGNORECASE)
+_ACCEPT_CSS = '[data-testid*="accept"], [aria-label*="accept"], [id*="accept"], [class*="accept"]'
+
+
+async def click_accept_if_present(page) -> bool:
+	# best-effort "Accept all" click; all candidates race in one wait instead of 1s per selector.
+	# Returns True once clicked and the post-consent requests have gone quiet.
+	# Visible nodes only (hidden CMP templates would stall the click), and the accessible-name
+	# match wins over the CSS heuristics, which can also hit wrappers around the real button.
+	by_name = page.get_by_role("button", name=_ACCEPT_NAME_RE).filter(visible=True)
+	by_attr = page.locator(_ACCEPT_CSS).filter(visible=True)
+	try:
+		await by_name.or_(by_attr).first.wait_for(state="visible", timeout=1500)
+		accept = by_name if await by_name.count() else by_attr
+		await accept.first.click(timeout=1500)
+	except Exception:
+		return False
+	try:
+		await page.wait_for_load_state("networkidle", timeout=3000)
+	except Exception:
+		pass
+	return True
 
 
 async def crawl_site(
@@ -64,7 +154,8 @@ async def crawl_site(
 		max_depth: int = 2,
 		include_subdomains: bool = False,
 		dual_pass: bool = False,
-		pause_ms_between_pages: int = 400
+		pause_ms_between_pages: int = 400,
+		max_concurrency: int = MAX_CRAWL_CONCURRENCY,
 ):
 	"""Crawl limited pages, aggregate cookies on one context."""
 	return await crawl_site_with_progress(
@@ -74,6 +165,7 @@ async def crawl_site(
 		include_subdomains=include_subdomains,
 		dual_pass=dual_pass,
 		pause_ms_between_pages=pause_ms_between_pages,
+		max_concurrency=max_concurrency,
 		progress_callback=None,
 	)
 
@@ -85,6 +177,7 @@ async def crawl_site_with_progress(
 		include_subdomains: bool = False,
 		dual_pass: bool = False,
 		pause_ms_between_pages: int = 400,
+		max_concurrency: int = MAX_CRAWL_CONCURRENCY,
 		progress_callback=None,
 ):
 	"""Crawl limited pages, aggregate cookies on one context. Supports progress callbacks."""
@@ -106,12 +199,20 @@ async def crawl_site_with_progress(
 		"postConsent": None  # filled if dual_pass
 	}
 
+	last_progress = {"stage": None, "at": 0.0}
+
 	def report_progress(stage, pct, msg, details=None):
-		if progress_callback:
-			try:
-				progress_callback(stage, pct, msg, details or {})
-			except Exception:
-				pass
+		if not progress_callback:
+			return
+		# Per-page 'crawling' updates are throttled; stage changes always go through
+		now = time.monotonic()
+		if stage == last_progress["stage"] and now - last_progress["at"] < PROGRESS_MIN_INTERVAL:
+			return
+		last_progress.update(stage=stage, at=now)
+		try:
+			progress_callback(stage, pct, msg, details or {})
+		except Exception:
+			pass
 
 	report_progress('init', 5, 'Initializing browser...')
 
@@ -119,20 +220,21 @@ async def crawl_site_with_progress(
 	context = await get_context()
 
 	try:
-		page = await context.new_page()
 		report_progress('crawling', 10, 'Browser ready, starting crawl...')
 
 		# ---- BFS crawl (single pass) ------------------------------------
-		queue = [(url, 0)]
+		# max_concurrency workers share one frontier and one context (so cookies
+		# still aggregate), each driving its own page. The visited check-and-add
+		# has no await in between, so it's atomic on the event loop without a lock.
+		frontier = asyncio.Queue()  # deque-backed: O(1) put/get
+		frontier.put_nowait((url, 0))
+		# dedupe at enqueue time (on the canonical URL) so repeat links never enter the frontier
+		queued = {canonicalize(url)}
 		visited = set()
 		any_banner = False
 
-		while queue and len(result["pagesScanned"]) < max_pages:
-			current, depth = queue.pop(0)
-			if current in visited or depth > max_depth:
-				continue
-			visited.add(current)
-
+		async def visit(page, current, depth):
+			nonlocal any_banner
 			pages_done = len(result["pagesScanned"])
 			progress_pct = 10 + int((pages_done / max_pages) * 80)  # 10-90%
 			report_progress(
@@ -143,25 +245,35 @@ async def crawl_site_with_progress(
 			)
 
 			try:
-				await page.add_init_script('Object.defineProperty(navigator,"webdriver",{get:()=>undefined})')
-				await page.goto(current, timeout=25000, wait_until="domcontentloaded")
-				await page.wait_for_load_state("networkidle", timeout=12000)
-				await page.wait_for_timeout(800)  # let tags settle a bit
+				await page.goto(current, wait_until="domcontentloaded")
+				try:
+					await page.wait_for_load_state("load", timeout=LOAD_TIMEOUT_MS)
+				except PlaywrightTimeoutError:
+					pass  # DOM is there; late subresources don't change the result much
+				await page.wait_for_timeout(SETTLE_MS)  # let tags settle a bit
 
-				html = await page.content()
-				has_banner = any(k in html.lower() for k in ["cookie", "consent", "gdpr", "manage preferences"])
+				try:
+					probe = await page.evaluate(_PAGE_PROBE_JS, {
+						"wantLinks": depth < max_depth,
+						# with subdomains the registrable-domain check stays in Python
+						"host": "" if include_subdomains else start_host,
+					})
+				except Exception:
+					probe = {}
+				has_banner = bool(probe.get("hasBanner"))
 				any_banner = any_banner or has_banner
 
 				result["pagesScanned"].append({"url": current, "hasConsentBanner": has_banner})
 
 				# gather links for BFS
 				try:
-					hrefs = await page.eval_on_selector_all("a[href]",
-															"els => els.map(a => a.getAttribute('href'))")
-					for link in normalize_links(hrefs, current):
-						host = urlparse(link).hostname
-						if same_site(host, start_host, include_subdomains):
-							queue.append((link, depth + 1))
+					for link in probe.get("hrefs") or ():
+						key = canonicalize(link)
+						if key in queued:
+							continue
+						if not include_subdomains or same_site(urlparse(link).hostname, start_host, True):
+							queued.add(key)
+							frontier.put_nowait((link, depth + 1))
 				except Exception:
 					pass
 
@@ -174,6 +286,37 @@ async def crawl_site_with_progress(
 			except Exception as e:
 				result["pagesScanned"].append({"url": current, "error": str(e)})
 
+		async def worker():
+			page = await context.new_page()
+			# Set per page: the context goes back to the shared pool
+			page.set_default_navigation_timeout(NAV_TIMEOUT_MS)
+			page.set_default_timeout(ACTION_TIMEOUT_MS)
+			try:
+				while True:
+					current, depth = await frontier.get()
+					try:
+						key = canonicalize(current)
+						if key in visited or depth > max_depth or len(visited) >= max_pages:
+							continue
+						visited.add(key)
+						await visit(page, current, depth)
+					finally:
+						frontier.task_done()
+			finally:
+				await page.close()
+
+		workers = [asyncio.create_task(worker()) for _ in range(max(1, min(max_concurrency, max_pages)))]
+		joined = asyncio.create_task(frontier.join())
+		try:
+			# Done when the frontier drains, or if every worker has died (e.g. new_page failed)
+			pending = {joined, *workers}
+			while joined in pending and len(pending) > 1:
+				_, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+		finally:
+			for task in (joined, *workers):
+				task.cancel()
+			await asyncio.gather(joined, *workers, return_exceptions=True)
+
 		report_progress('analyzing', 90, 'Analyzing cookies...')
 
 		# aggregate cookies after crawl
@@ -181,26 +324,18 @@ async def crawl_site_with_progress(
 		result["hasConsentBanner"] = any_banner
 
 		# classify
-		def counts(cookies_list):
-			first, third, track, uncls = 0, 0, 0, 0
-			cookie_rows = []
-			for c in cookies_list:
-				classification = classify_cookie(c["name"])
-				is_third = base_domain(c["domain"]) != base_domain(start_host)
-				ctype = "Third-party" if is_third else "First-party"
-				row = {
-					"name": c["name"], "domain": c["domain"], "path": c.get("path", "/"),
-					"expires": "Session" if c.get("expires", -1) == -1 else c.get("expires"),
-					"type": ctype, "classification": classification
-				}
-				cookie_rows.append(row)
-				first += (ctype == "First-party")
-				third += (ctype == "Third-party")
-				track += (classification == "Tracker")
-				uncls += (classification != "Tracker")
-			return cookie_rows, first, third, track, uncls
-
-		cookie_rows, first, third, track, uncls = counts(cookies)
+		start_base = base_domain(start_host)
+
+		# (domain, name, path) -> (type, classification); the post-consent pass only
+		# classifies cookies that weren't already there before the Accept click
+		kinds = {}
+
+		async def counts(cookies_list, with_rows=True):
+			if len(cookies_list) >= CLASSIFY_IN_THREAD_AT:
+				return await asyncio.to_thread(count_cookies, cookies_list, start_base, kinds, with_rows)
+			return count_cookies(cookies_list, start_base, kinds, with_rows)
+
+		cookie_rows, first, third, track, uncls = await counts(cookies)
 		result.update({
 			"cookies": cookie_rows,
 			"firstPartyCount": first,
@@ -227,16 +362,24 @@ async def crawl_site_with_progress(
 			try:
 				# pick a representative page (homepage or last good page)
 				rep = result["pagesScanned"][0]["url"] if result["pagesScanned"] else url
-				await page.goto(rep, timeout=25000, wait_until="domcontentloaded")
+				page = await context.new_page()
+				page.set_default_timeout(ACTION_TIMEOUT_MS)
+				await page.goto(rep, timeout=NAV_TIMEOUT_MS, wait_until="domcontentloaded")
+				# no fixed sleep: the click already waited for network idle, and without
+				# a click nothing new gets set
 				await click_accept_if_present(page)
-				await page.wait_for_timeout(1000)
 				after_cookies = await context.cookies()
 				result["preConsent"] = {
 					"counts": {"first": first, "third": third, "tracker": track, "unclassified": uncls}
 				}
-				after_rows, after_first, after_third, after_track, after_uncls = counts(after_cookies)
+				# kinds holds exactly the pre-consent cookies at this point; only the delta gets classified
+				pre_keys = set(kinds)
+				added = [c for c in after_cookies if (c["domain"], c["name"], c.get("path", "/")) not in pre_keys]
+				_, after_first, after_third, after_track, after_uncls = await counts(after_cookies, with_rows=False)
+				_, add_first, add_third, add_track, add_uncls = await counts(added, with_rows=False)
 				result["postConsent"] = {
-					"counts": {"first": after_first, "third": after_third, "tracker": after_track, "unclassified": after_uncls}
+					"counts": {"first": after_first, "third": after_third, "tracker": after_track, "unclassified": after_uncls},
+					"added": {"first": add_first, "third": add_third, "tracker": add_track, "unclassified": add_uncls},
 				}
 			except Exception:
 				# dual pass is best-effort; ignore failures
@@ -254,8 +397,8 @@ async def crawl_site_with_progress(
 		traceback.print_exc()
 		result = {"error": msg}
 	finally:
-		# Close context but keep browser alive for next scan
-		await context.close()
+		# Return context to the pool; browser stays alive for next scan
+		await release_context(context)
 
 	result["duration"] = round(time.perf_counter() - t0, 2)
 	return result
@@ -0,0 +1,25 @@
+# scanner/hostnames.py
+"""
+Registrable-domain lookup shared by the crawler and the single-page scanners
+(async, sync and direct), so first/third-party classification can't drift.
+"""
+from functools import lru_cache
+
+from tldextract import TLDExtract
+
+# Bundled public suffix list snapshot: no network fetch or disk cache on first use
+_extract = TLDExtract(suffix_list_urls=(), cache_dir=None)
+
+
+@lru_cache(maxsize=8192)
+def base_domain(host: str) -> str:
+	"""
+	"www.shop.example.co.uk" -> "example.co.uk". Leading dots from cookie domains
+	are ignored. A scan sees the same few hosts across hundreds of links/cookies,
+	so this is almost always a cache hit.
+	"""
+	host = (host or "").lstrip(".")
+	if "." not in host:
+		return host
+	parts = _extract(host)
+	return f"{parts.domain}.{parts.suffix}" if parts.suffix else parts.domain
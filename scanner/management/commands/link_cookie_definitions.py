@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from scanner.models import BULK_BATCH_SIZE, Cookie
+
+
+class Command(BaseCommand):
+	help = 'Link stored cookies that have no definition yet to matching cookie definitions'
+
+	def handle(self, *args, **options):
+		# Walk unlinked cookies in id order, one batch at a time: one CookieDefinition query
+		# and one bulk UPDATE per batch instead of a find_match per cookie
+		unlinked = (
+			Cookie.objects
+			.filter(definition__isnull=True)
+			.exclude(name='')
+			.exclude(domain='')
+			.only('id', 'name', 'domain', 'category', 'user_category', 'effective_category', 'definition')
+			.order_by('id')
+		)
+
+		scanned = 0
+		linked = 0
+		last_id = 0
+		while True:
+			batch = list(unlinked.filter(id__gt=last_id)[:BULK_BATCH_SIZE])
+			if not batch:
+				break
+			last_id = batch[-1].id
+			scanned += len(batch)
+
+			Cookie.preclassify(batch)
+			matched = [c for c in batch if c.definition_id]
+			Cookie.objects.bulk_update(matched, ['definition', 'category', 'effective_category'], batch_size=BULK_BATCH_SIZE)
+			linked += len(matched)
+
+		self.stdout.write(self.style.SUCCESS(f"Linked {linked} of {scanned} unlinked cookies"))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-15 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cookiedefinition',
+            index=models.Index(fields=['name', '-classification_confidence'], name='cookiedef_name_conf_idx'),
+        ),
+    ]
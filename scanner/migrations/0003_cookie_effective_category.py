@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-15 14:10
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Q, Subquery
+
+
+def backfill_effective_category(apps, schema_editor):
+    Cookie = apps.get_model('scanner', 'Cookie')
+    CookieDefinition = apps.get_model('scanner', 'CookieDefinition')
+    no_override = Q(user_category__isnull=True) | Q(user_category='')
+
+    Cookie.objects.exclude(no_override).update(effective_category=models.F('user_category'))
+    Cookie.objects.filter(no_override, definition__isnull=False).update(
+        effective_category=Subquery(
+            CookieDefinition.objects.filter(pk=OuterRef('definition_id')).values('category')[:1]
+        )
+    )
+    Cookie.objects.filter(no_override, definition__isnull=True).update(effective_category=models.F('category'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0002_cookiedefinition_cookiedef_name_conf_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cookie',
+            name='effective_category',
+            field=models.CharField(choices=[('necessary', 'Strictly Necessary'), ('functional', 'Functional'), ('analytics', 'Analytics'), ('marketing', 'Marketing/Advertising'), ('other', 'Other')], db_index=True, default='other', max_length=20),
+        ),
+        migrations.RunPython(backfill_effective_category, migrations.RunPython.noop),
+    ]
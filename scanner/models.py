@@ -1,5 +1,13 @@
+import re
 import uuid
-from django.db import models
+from functools import lru_cache
+from django.db import models, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+
+# Rows per INSERT for bulk_create/bulk_update on scanner models: keeps statements under
+# the DB's bind-parameter cap and avoids building one huge query in memory
+BULK_BATCH_SIZE = 500
 
 
 class CookieDefinition(models.Model):
@@ -56,19 +64,52 @@ class CookieDefinition(models.Model):
 			models.Index(fields=['domain_pattern']),
 			models.Index(fields=['category']),
 			models.Index(fields=['-times_seen']),
+			# find_match's name + confidence >= 0.8 fallback
+			models.Index(fields=['name', '-classification_confidence'], name='cookiedef_name_conf_idx'),
 		]
 
 	def __str__(self):
 		return f"{self.name} ({self.domain_pattern}) - {self.category}"
 
+	def save(self, *args, **kwargs):
+		super().save(*args, **kwargs)
+		# Full saves (admin/shell edits) may change category; keep linked cookies in step
+		update_fields = kwargs.get('update_fields')
+		if update_fields is None or 'category' in update_fields:
+			Cookie.objects.filter(definition_id=self.pk).filter(
+				Q(user_category__isnull=True) | Q(user_category='')
+			).exclude(effective_category=self.category).update(effective_category=self.category)
+
 	def add_classification_vote(self, category: str):
-		"""Add a user's classification vote and recalculate consensus."""
+		"""
+		Add a user's classification vote and recalculate consensus. The increment is
+		an F() UPDATE, so concurrent voters can't overwrite each other's votes; the
+		consensus is then recomputed from the committed counts under the same row lock.
+		"""
 		vote_field = f"votes_{category}"
-		if hasattr(self, vote_field):
-			setattr(self, vote_field, getattr(self, vote_field) + 1)
-			self.times_classified += 1
-			self._recalculate_category()
-			self.save()
+		if not hasattr(self, vote_field):
+			return
+		vote_fields = [f"votes_{c}" for c, _ in self.CATEGORY_CHOICES]
+		with transaction.atomic():
+			CookieDefinition.objects.filter(pk=self.pk).update(**{
+				vote_field: F(vote_field) + 1,
+				'times_classified': F('times_classified') + 1,
+			})
+			fresh = CookieDefinition.objects.only(*vote_fields, 'times_classified', 'category').get(pk=self.pk)
+			previous_category = fresh.category
+			fresh._recalculate_category()
+			CookieDefinition.objects.filter(pk=self.pk).update(
+				category=fresh.category,
+				classification_confidence=fresh.classification_confidence,
+				updated_at=timezone.now(),
+			)
+			if fresh.category != previous_category:
+				# Linked cookies without a user override follow the new consensus
+				Cookie.objects.filter(definition_id=self.pk).filter(
+					Q(user_category__isnull=True) | Q(user_category='')
+				).update(effective_category=fresh.category)
+		for field in (*vote_fields, 'times_classified', 'category', 'classification_confidence'):
+			setattr(self, field, getattr(fresh, field))
 
 	def _recalculate_category(self):
 		"""Set category to the one with most votes and calculate confidence."""
@@ -87,30 +128,34 @@ class CookieDefinition(models.Model):
 
 	@classmethod
 	def find_match(cls, cookie_name: str, cookie_domain: str):
-		"""Find a matching definition for a cookie."""
-		# Try exact match first
-		match = cls.objects.filter(
-			name=cookie_name,
-			domain_pattern=cookie_domain
-		).first()
-		if match:
-			return match
-
-		# Try matching base domain (e.g., .google.com matches analytics.google.com)
+		"""
+		Find a matching definition for a cookie, in one query. Preference: exact
+		domain, then the cookie's dotless domain or a pattern ending in it on a label
+		boundary (e.g. pattern .google.com matches cookie domain google.com, but
+		.notgoogle.com doesn't), then a name-only match for well-known (high
+		confidence) cookies.
+		"""
 		base_domain = cookie_domain.lstrip('.')
-		match = cls.objects.filter(
-			name=cookie_name,
-			domain_pattern__icontains=base_domain
-		).first()
-		if match:
-			return match
-
-		# Try name-only match for well-known cookies (high confidence ones)
-		match = cls.objects.filter(
-			name=cookie_name,
-			classification_confidence__gte=0.8
-		).first()
-		return match
+		base_match = Q(domain_pattern__iexact=base_domain) | Q(domain_pattern__iendswith='.' + base_domain)
+		return (
+			cls.objects
+			.filter(name=cookie_name)
+			.filter(
+				Q(domain_pattern=cookie_domain)
+				| base_match
+				| Q(classification_confidence__gte=0.8)
+			)
+			.annotate(match_rank=Case(
+				When(domain_pattern=cookie_domain, then=Value(0)),
+				When(base_match, then=Value(1)),
+				default=Value(2),
+				output_field=IntegerField(),
+			))
+			.order_by('match_rank', '-times_seen')
+			# callers only read category/provider (and link the row); skip description and vote counts
+			.only('id', 'name', 'domain_pattern', 'category', 'provider', 'classification_confidence')
+			.first()
+		)
 
 	@classmethod
 	def get_or_create_from_cookie(cls, cookie_name: str, cookie_domain: str):
@@ -268,49 +313,183 @@ class Cookie(models.Model):
 	user_category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, null=True, blank=True)
 	user_description = models.TextField(blank=True)
 
+	# Resolved user override > definition > own category, kept in sync on save (and by
+	# CookieDefinition.save/add_classification_vote and refresh_effective_category for bulk
+	# definition changes) so listing/filtering needs no definition join
+	effective_category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='other', db_index=True)
+
 	def __str__(self):
 		return f"{self.name} ({self.type})"
 
-	def get_effective_category(self):
-		"""Return user override if set, otherwise use definition or default."""
+	def _resolve_effective_category(self):
 		if self.user_category:
 			return self.user_category
-		if self.definition:
+		if self.definition_id:
 			return self.definition.category
 		return self.category
 
+	def get_effective_category(self):
+		"""Return user override if set, otherwise use definition or default."""
+		return self.effective_category
+
+	@classmethod
+	def refresh_effective_category(cls, definitions=None, unlinked=False):
+		"""
+		Re-resolve the stored effective_category with set-based UPDATEs (as in migration
+		0003) after definition categories change in bulk. definitions limits the linked
+		pass to cookies of those definitions (queryset or ids); unlinked also re-syncs
+		cookies with no definition, e.g. after definitions were deleted (SET_NULL).
+		"""
+		no_override = Q(user_category__isnull=True) | Q(user_category='')
+		linked = cls.objects.filter(no_override, definition__isnull=False)
+		if definitions is not None:
+			linked = linked.filter(definition__in=definitions)
+		linked.exclude(effective_category=F('definition__category')).update(
+			effective_category=Subquery(
+				CookieDefinition.objects.filter(pk=OuterRef('definition_id')).values('category')[:1]
+			)
+		)
+		if unlinked:
+			cls.objects.filter(no_override, definition__isnull=True).exclude(
+				effective_category=F('category')
+			).update(effective_category=F('category'))
+
 	@classmethod
 	def guess_category_from_name(cls, cookie_name: str, cookie_domain: str = '') -> str:
 		"""Guess cookie category based on known patterns."""
-		name_lower = cookie_name.lower()
-		domain_lower = cookie_domain.lower()
-
-		# Check domain-based hints first
-		if any(d in domain_lower for d in ['google-analytics', 'analytics.google', 'hotjar', 'clarity.ms', 'mixpanel', 'heap']):
-			return 'analytics'
-		if any(d in domain_lower for d in ['facebook', 'fb.com', 'doubleclick', 'googlesyndication', 'googleads', 'linkedin', 'twitter', 'tiktok', 'criteo', 'taboola']):
-			return 'marketing'
+		return _guess_category(cookie_name.lower(), cookie_domain.lower())
+
+	@staticmethod
+	def _match_definition(candidates, cookie_name: str, cookie_domain: str):
+		"""
+		In-memory CookieDefinition.find_match over `candidates` (the definitions
+		sharing this cookie's name, in default -times_seen order), same fallbacks.
+		"""
+		match = next((d for d in candidates if d.domain_pattern == cookie_domain), None)
+		if match is None:
+			base = cookie_domain.lstrip('.').lower()
+			match = next((
+				d for d in candidates
+				if (pattern := d.domain_pattern.lower()) == base or pattern.endswith('.' + base)
+			), None)
+		if match is None:
+			match = next((d for d in candidates if d.classification_confidence >= 0.8), None)
+		return match
 
-		# Check name patterns
-		for category, patterns in cls.KNOWN_PATTERNS.items():
-			for pattern in patterns:
-				pattern_lower = pattern.lower()
-				if name_lower == pattern_lower or name_lower.startswith(pattern_lower):
-					return category
+	@classmethod
+	def preclassify(cls, instances):
+		"""
+		Apply save()'s auto-classification to unsaved instances in bulk: one
+		CookieDefinition query for the whole batch instead of up to one per cookie.
+		Use before bulk_create (which skips save()).
+		"""
+		defs_by_name = {}
+		names = {c.name for c in instances if c.name and c.domain and not c.definition_id}
+		if names:
+			for definition in CookieDefinition.objects.filter(name__in=names):
+				defs_by_name.setdefault(definition.name, []).append(definition)
+
+		for cookie in instances:
+			if not cookie.definition_id and cookie.name and cookie.domain:
+				cookie.definition = cls._match_definition(defs_by_name.get(cookie.name, ()), cookie.name, cookie.domain)
+				if cookie.definition:
+					cookie.category = cookie.definition.category
+			if cookie.category == 'other' and not cookie.user_category:
+				cookie.category = cls.guess_category_from_name(cookie.name, cookie.domain)
+			cookie.effective_category = cookie._resolve_effective_category()
+		return instances
 
-		return 'other'
+	@classmethod
+	def bulk_classify_and_create(cls, scan, cookie_dicts):
+		"""Create a scan's cookies in one INSERT, classified as save() would."""
+		objs = [
+			cls(
+				scan=scan,
+				name=c.get('name', ''),
+				domain=c.get('domain', ''),
+				path=c.get('path', '/'),
+				expires=c.get('expires', 'Session'),
+				type=c.get('type', 'First-party'),
+				classification=c.get('classification', 'Unclassified'),
+			)
+			for c in cookie_dicts
+		]
+		return cls.objects.bulk_create(cls.preclassify(objs), batch_size=BULK_BATCH_SIZE)
 
 	def save(self, *args, **kwargs):
+		classified = set()
+
 		# Auto-link to definition if not set
 		if not self.definition and self.name and self.domain:
 			self.definition = CookieDefinition.find_match(self.name, self.domain)
 			if self.definition:
 				self.category = self.definition.category
+				classified.update(('definition', 'category'))
 
 		# If still 'other', try pattern-based classification
 		if self.category == 'other' and not self.user_category:
 			guessed = self.guess_category_from_name(self.name, self.domain)
 			if guessed != 'other':
 				self.category = guessed
+				classified.add('category')
+
+		effective = self._resolve_effective_category()
+		if effective != self.effective_category:
+			self.effective_category = effective
+			classified.add('effective_category')
+
+		# A partial save must still persist whatever auto-classification just filled in
+		update_fields = kwargs.get('update_fields')
+		if update_fields is not None and classified:
+			kwargs['update_fields'] = {*update_fields, *classified}
 
 		super().save(*args, **kwargs)
+
+
+# guess_category_from_name lookups, compiled once. The name regex is one anchored
+# alternation with a named group per category: the regex engine tries alternatives
+# in table order, so the first hit matches what the old nested startswith loop returned.
+ANALYTICS_DOMAIN_HINTS = (
+	'google-analytics', 'analytics.google', 'hotjar', 'clarity.ms', 'mixpanel', 'heap',
+)
+MARKETING_DOMAIN_HINTS = (
+	'facebook', 'fb.com', 'doubleclick', 'googlesyndication', 'googleads', 'linkedin', 'twitter', 'tiktok', 'criteo', 'taboola',
+)
+_ANALYTICS_DOMAIN_RE = re.compile("|".join(map(re.escape, ANALYTICS_DOMAIN_HINTS)))
+_MARKETING_DOMAIN_RE = re.compile("|".join(map(re.escape, MARKETING_DOMAIN_HINTS)))
+
+
+def _compile_name_patterns(known_patterns: dict) -> re.Pattern:
+	"""
+	Build the anchored name regex. A pattern that starts with an earlier one (in any
+	category) can never win, e.g. '_hjSessionUser' after '_hjSession', so it's
+	left out of the alternation.
+	"""
+	kept = []
+	groups = []
+	for category, patterns in known_patterns.items():
+		alts = []
+		for p in dict.fromkeys(p.lower() for p in patterns):
+			if not any(p.startswith(q) for q in kept):
+				kept.append(p)
+				alts.append(re.escape(p))
+		if alts:
+			groups.append(f"(?P<{category}>{'|'.join(alts)})")
+	return re.compile("|".join(groups))
+
+
+_KNOWN_NAME_RE = _compile_name_patterns(Cookie.KNOWN_PATTERNS)
+
+
+@lru_cache(maxsize=8192)
+def _guess_category(name_lower: str, domain_lower: str) -> str:
+	# Pure function of (name, domain); scans keep re-seeing _ga, _gid, __hstc, ...
+	# Check domain-based hints first
+	if _ANALYTICS_DOMAIN_RE.search(domain_lower):
+		return 'analytics'
+	if _MARKETING_DOMAIN_RE.search(domain_lower):
+		return 'marketing'
+
+	# Check name patterns (prefix match; first category/pattern in table order wins)
+	match = _KNOWN_NAME_RE.match(name_lower)
+	return match.lastgroup if match else 'other'
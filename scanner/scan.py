@@ -1,6 +1,5 @@
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from urllib.parse import urlparse
-from tldextract import extract
 import traceback
 import time
 import logging
@@ -9,7 +8,8 @@ import redis
 from django.conf import settings
 from asgiref.sync import sync_to_async
 
-from scanner.browser_pool import get_context
+from scanner.browser_pool import get_context, release_context
+from scanner.hostnames import base_domain
 from scanner.models import CookieDefinition
 
 logger = logging.getLogger("scanner")
@@ -57,17 +57,6 @@ def classify_cookie_sync(name: str, domain: str) -> tuple[str, str, str]:
 classify_cookie = sync_to_async(classify_cookie_sync, thread_sensitive=True)
 
 
-def get_base_domain(host):
-	if not host:
-		return ""
-	# Strip leading dots from cookie domains (e.g., ".example.com" -> "example.com")
-	host = host.lstrip(".")
-	if not host:
-		return ""
-	parts = extract(host)
-	return f"{parts.domain}.{parts.suffix}" if parts.suffix else parts.domain
-
-
 def save_screenshot_to_redis(screenshot_bytes: bytes) -> str:
 	"""Save screenshot to Redis and return the key."""
 	screenshot_id = str(uuid.uuid4())
@@ -100,11 +89,6 @@ async def scan_site(url: str):
 	try:
 		page = await context.new_page()
 
-		logger.info("[scan_site] Injecting evasion script...")
-		await page.add_init_script(
-			"""Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"""
-		)
-
 		max_retries = 2
 		for attempt in range(max_retries):
 			try:
@@ -150,7 +134,7 @@ async def scan_site(url: str):
 
 		for c in cookies:
 			classification, category, provider = await classify_cookie(c["name"], c["domain"])
-			is_third_party = get_base_domain(c["domain"]) != get_base_domain(parsed_host)
+			is_third_party = base_domain(c["domain"]) != base_domain(parsed_host)
 			ctype = "Third-party" if is_third_party else "First-party"
 
 			cookie_info = {
@@ -219,13 +203,9 @@ async def scan_site(url: str):
 		result = {"error": error_message}
 
 	finally:
-		# Close context but keep browser alive for next scan
-		logger.info("[scan_site] Closing context...")
-		try:
-			await context.close()
-		except Exception as close_error:
-			# Context may already be closed, that's okay
-			logger.debug("[scan_site] Context close error (safe to ignore): %s", close_error)
+		# Return context to the pool; browser stays alive for next scan
+		logger.info("[scan_site] Releasing context...")
+		await release_context(context)
 
 	logger.info("[scan_site] Returning result.")
 	return result
@@ -5,7 +5,6 @@ No browser pool - designed for subprocess isolation.
 """
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 from urllib.parse import urlparse
-from tldextract import extract
 import traceback
 import time
 import logging
@@ -13,6 +12,8 @@ import uuid
 import redis
 from django.conf import settings
 
+from scanner.browser_config import BLOCKED_RESOURCE_TYPES, HEAVY_RESOURCE_RE
+from scanner.hostnames import base_domain
 from scanner.models import CookieDefinition
 
 logger = logging.getLogger("scanner")
@@ -85,16 +86,6 @@ def classify_cookie(name: str, domain: str) -> tuple[str, str, str]:
     return ('Unclassified', 'other', '')
 
 
-def get_base_domain(host):
-    if not host:
-        return ""
-    host = host.lstrip(".")
-    if not host:
-        return ""
-    parts = extract(host)
-    return f"{parts.domain}.{parts.suffix}" if parts.suffix else parts.domain
-
-
 def scan_site_direct(url: str) -> dict:
     """
     Direct scan that launches a fresh browser.
@@ -124,11 +115,16 @@ def scan_site_direct(url: str) -> dict:
             bypass_csp=True,
         )
 
-        # Block heavy resources
-        context.route(
-            "**/*.{woff,woff2,ttf,eot,mp4,webm,mp3,wav,ogg,avi,mov,pdf}",
-            lambda route: route.abort()
-        )
+        # Block heavy resources by type as well as extension (fonts/media served
+        # without a file suffix slipped through the glob)
+        def block_heavy(route):
+            request = route.request
+            if request.resource_type in BLOCKED_RESOURCE_TYPES or HEAVY_RESOURCE_RE.search(request.url.lower()):
+                route.abort()
+                return
+            route.continue_()
+
+        context.route("**/*", block_heavy)
 
         page = context.new_page()
 
@@ -174,7 +170,7 @@ def scan_site_direct(url: str) -> dict:
 
         for c in cookies:
             classification, category, provider = classify_cookie(c["name"], c["domain"])
-            is_third_party = get_base_domain(c["domain"]) != get_base_domain(parsed_host)
+            is_third_party = base_domain(c["domain"]) != base_domain(parsed_host)
             ctype = "Third-party" if is_third_party else "First-party"
 
             cookie_info = {
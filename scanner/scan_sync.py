@@ -5,7 +5,6 @@ Uses sync_playwright which works better with Celery on Windows.
 """
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from urllib.parse import urlparse
-from tldextract import extract
 import traceback
 import time
 import logging
@@ -13,7 +12,8 @@ import uuid
 import redis
 from django.conf import settings
 
-from scanner.browser_pool_sync import get_context
+from scanner.browser_pool_sync import get_context, release_context
+from scanner.hostnames import base_domain
 from scanner.models import CookieDefinition
 
 logger = logging.getLogger("scanner")
@@ -66,17 +66,6 @@ def classify_cookie(name: str, domain: str) -> tuple[str, str, str]:
     return ('Unclassified', 'other', '')
 
 
-def get_base_domain(host):
-    if not host:
-        return ""
-    # Strip leading dots from cookie domains (e.g., ".example.com" -> "example.com")
-    host = host.lstrip(".")
-    if not host:
-        return ""
-    parts = extract(host)
-    return f"{parts.domain}.{parts.suffix}" if parts.suffix else parts.domain
-
-
 def scan_site_sync(url: str, progress_callback=None):
     """Synchronous single-page scan."""
     logger.info("[scan_site_sync] Starting scan for: %s", url)
@@ -103,11 +92,6 @@ def scan_site_sync(url: str, progress_callback=None):
         page = context.new_page()
         report_progress('scanning', 10, 'Loading page...')
 
-        logger.info("[scan_site_sync] Injecting evasion script...")
-        page.add_init_script(
-            """Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"""
-        )
-
         max_retries = 2
         for attempt in range(max_retries):
             try:
@@ -154,7 +138,7 @@ def scan_site_sync(url: str, progress_callback=None):
 
         for c in cookies:
             classification, category, provider = classify_cookie(c["name"], c["domain"])
-            is_third_party = get_base_domain(c["domain"]) != get_base_domain(parsed_host)
+            is_third_party = base_domain(c["domain"]) != base_domain(parsed_host)
             ctype = "Third-party" if is_third_party else "First-party"
 
             cookie_info = {
@@ -225,11 +209,8 @@ def scan_site_sync(url: str, progress_callback=None):
         result = {"error": error_message, "duration": round(time.perf_counter() - start_time, 2)}
 
     finally:
-        logger.info("[scan_site_sync] Closing context...")
-        try:
-            context.close()
-        except Exception as close_error:
-            logger.debug("[scan_site_sync] Context close error (safe to ignore): %s", close_error)
+        logger.info("[scan_site_sync] Releasing context...")
+        release_context(context)
 
     logger.info("[scan_site_sync] Returning result.")
     return result
@@ -90,20 +90,10 @@ def run_scan_task(
 			)
 
 			# Create Cookie objects from scan results
-			for cookie_data in result.get('cookies', []):
-				Cookie.objects.create(
-					scan=scan_result,
-					name=cookie_data.get('name', ''),
-					domain=cookie_data.get('domain', ''),
-					path=cookie_data.get('path', '/'),
-					expires=cookie_data.get('expires', 'Session'),
-					type=cookie_data.get('type', 'First-party'),
-					classification=cookie_data.get('classification', 'Unclassified'),
-				)
+			Cookie.bulk_classify_and_create(scan_result, result.get('cookies', []))
 
 			if domain:
-				domain.last_scan_at = timezone.now()
-				domain.save(update_fields=['last_scan_at'])
+				Domain.objects.filter(pk=domain.pk).update(last_scan_at=timezone.now())
 
 			# Add scan result ID to response
 			result['scan_result_id'] = str(scan_result.id)
@@ -212,10 +212,11 @@ def domain_cookies(request, domain_id):
 	if not latest_scan:
 		return Response({"cookies": [], "total": 0})
 
-	cookies = latest_scan.cookies.all()
+	# definition is read per row below (has_definition / confidence): join it instead of N+1
+	cookies = list(latest_scan.cookies.select_related('definition'))
 	cookies_data = []
 
-	if cookies.exists():
+	if cookies:
 		# Use Cookie model objects
 		for cookie in cookies:
 			cookies_data.append({
@@ -237,17 +238,7 @@ def domain_cookies(request, domain_id):
 		# Also create Cookie objects for future use
 		result_data = latest_scan.result or {}
 		raw_cookies = result_data.get('cookies', [])
-		for i, cookie_data in enumerate(raw_cookies):
-			# Create Cookie object
-			cookie = Cookie.objects.create(
-				scan=latest_scan,
-				name=cookie_data.get('name', ''),
-				domain=cookie_data.get('domain', ''),
-				path=cookie_data.get('path', '/'),
-				expires=cookie_data.get('expires', 'Session'),
-				type=cookie_data.get('type', 'First-party'),
-				classification=cookie_data.get('classification', 'Unclassified'),
-			)
+		for cookie in Cookie.bulk_classify_and_create(latest_scan, raw_cookies):
 			cookies_data.append({
 				"id": cookie.id,
 				"name": cookie.name,
@@ -266,8 +257,8 @@ def domain_cookies(request, domain_id):
 	return Response({
 		"cookies": cookies_data,
 		"total": len(cookies_data),
-		"scan_id": str(latest_scan.id),
-		"scanned_at": latest_scan.scanned_at.isoformat(),
+		"scan_id": latest_scan.id,
+		"scanned_at": latest_scan.scanned_at,
 	})
 
 
@@ -305,7 +296,7 @@ def classify_cookie(request, cookie_id):
 	# Set user override
 	cookie.user_category = category
 	cookie.user_description = description
-	cookie.save()
+	cookie.save(update_fields=['user_category', 'user_description'])
 
 	# Contribute to crowdsourced database
 	if cookie.definition: